@@ -1,10 +1,22 @@
-from flask import Flask
+from flask import Flask, Response, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 import logging
 
-from utils.db import init_mongo, get_collections, get_client
+from utils.db import init_mongo, check_connection, get_collections, get_client, get_index_report, get_pool_stats
+from utils.write_behind import all_stats as write_behind_stats
+from utils import user_context
+from utils.user_context import profile_cache
+from utils.auth import token_cache
+from utils.hash_pool import hash_pool
+from utils.startup import readiness
+from utils import metrics as request_metrics
+from utils import compression
+from utils.profiling import request_profiler
+from utils.json_provider import JSONProvider
+from utils import openweather
+from utils.openweather import snapshot_cache
 
 
 def create_app() -> Flask:
@@ -14,6 +26,8 @@ def create_app() -> Flask:
     load_dotenv(dotenv_path=env_path, override=False)
 
     app = Flask(__name__)
+    # orjson-backed when installed; ObjectId and datetime values serialize without conversion
+    app.json = JSONProvider(app)
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
 
     # Ensure model instrumentation logs appear even when running via python app.py
@@ -27,6 +41,18 @@ def create_app() -> Flask:
         origins = ["http://localhost:8080"]
     CORS(app, resources={r"/api/*": {"origins": origins}})
 
+    # Per-endpoint latency histograms, in-flight gauges and error counters (METRICS_ENABLED=0 to disable)
+    request_metrics.init_app(app)
+
+    # gzip (or br when the brotli module is installed) for JSON/text bodies over COMPRESS_MIN_BYTES
+    compression.init_app(app)
+
+    # OpenWeather snapshot TTL (also the max-age of the upstream-only endpoints)
+    openweather.init_app(app)
+
+    # Profile cache TTL/size (USER_CACHE_*)
+    user_context.init_app(app)
+
     @app.get("/api/health")
     def health():
         cols = get_collections()
@@ -50,33 +76,73 @@ def create_app() -> Flask:
             "collections": list(cols.keys()) if cols else [],
             "allowedOrigins": origins,
             "mongoUriPresent": bool(os.getenv("MONGO_URI")),
+            "mongoIndexes": get_index_report(),
+            "mongoPool": get_pool_stats() if mongo_ok else None,
+            "writeBehind": write_behind_stats(),
+            "userCache": profile_cache.stats(),
+            "tokenCache": token_cache.stats(),
+            "passwordHashing": hash_pool.snapshot(),
+            "openweatherCache": snapshot_cache.stats(),
+            "startup": readiness.snapshot(),
             "envFile": env_path if os.path.exists(env_path) else None,
         }
 
+    @app.get("/api/ready")
+    def ready():
+        """Readiness probe: 503 until the start-up warm-up steps have finished."""
+        snap = readiness.snapshot()
+        return snap, (200 if snap["ready"] else 503)
+
+    @app.get("/api/metrics")
+    def metrics():
+        """Prometheus text exposition; set METRICS_TOKEN to require ``Authorization: Bearer <token>``."""
+        token = os.getenv("METRICS_TOKEN")
+        if token and request.headers.get("Authorization", "") != f"Bearer {token}":
+            return {"error": "Unauthorized"}, 401
+        return Response(request_metrics.metrics.render(), mimetype="text/plain; version=0.0.4")
+
     # Register blueprints
     from routes.auth import auth_bp
     from routes.weather import weather_bp
     from routes.carbon import carbon_bp
     from routes.region import region_bp
     from routes.chat import chat_bp
+    from routes.debug import debug_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(weather_bp, url_prefix="/api/weather")
     app.register_blueprint(carbon_bp, url_prefix="/api/carbon")
     app.register_blueprint(region_bp, url_prefix="/api/region")
     app.register_blueprint(chat_bp, url_prefix="/api/chat")
+    app.register_blueprint(debug_bp, url_prefix="/api/debug")
+
+    # Opt-in per-request cProfile (PROFILE_ADMIN_TOKEN header or PROFILE_SAMPLE_RATE); no-op otherwise
+    request_profiler.init_app(app)
 
-    # Initialize Mongo (optional if MONGO_URI not set)
-    mongo_cols = init_mongo()
+    # Initialize Mongo (optional if MONGO_URI not set). Creating the client does no I/O; the
+    # ping and index check run as a warm-up step below.
+    mongo_cols = init_mongo(ping=False)
     if mongo_cols:
         app.config["MONGO_COLLECTIONS"] = mongo_cols
     else:
         # If no URI, keep running without DB rather than failing hard.
         app.logger.info("MongoDB not initialized: MONGO_URI not provided.")
 
-    # Warm-load ML artifacts on startup (non-fatal if missing)
-    try:
+    def warm_mongo():
+        if not mongo_cols or os.getenv("MONGO_STARTUP_PING", "1") != "1":
+            return False
+        index_report = check_connection()
+        if index_report["created"]:
+            app.logger.info("MongoDB indexes created: %s", index_report["created"])
+        if index_report["missing"]:
+            app.logger.warning("MongoDB indexes missing: %s", index_report["missing"])
+        if index_report["errors"]:
+            app.logger.warning("MongoDB index check errors: %s", index_report["errors"])
+
+    def warm_ml_artifacts():
+        # Load ML artifacts (pulls in pandas/sklearn); non-fatal if missing
         from utils.model_artifacts import get_all, artifacts_present
+        import pandas  # noqa: F401  (used by every prediction)
         arts = get_all()
         present = artifacts_present()
         app.logger.info("ML artifacts loaded: present=%s", present)
@@ -88,8 +154,20 @@ def create_app() -> Flask:
         else:
             app.logger.warning("Carbon footprint model artifact missing; predictions will fall back or fail.")
         app.config["ML_ARTIFACTS"] = arts
-    except Exception as e:
-        app.logger.warning("ML artifacts not loaded: %s", e)
+
+    def warm_gemini():
+        if not os.getenv("GEMINI_API_KEY"):
+            return False
+        import google.generativeai  # noqa: F401
+
+    # STARTUP_MODE=lazy serves requests immediately and warms up on background threads;
+    # /api/ready reports when that has finished. The default runs the same steps inline.
+    lazy = os.getenv("STARTUP_MODE", "eager").lower() == "lazy"
+    tasks = [("mongo", warm_mongo), ("mlArtifacts", warm_ml_artifacts)]
+    if lazy:
+        # Eager start-up has always imported the Gemini SDK on first use; lazy mode pre-imports it.
+        tasks.append(("gemini", warm_gemini))
+    readiness.start(tasks, background=lazy)
 
     return app
 
@@ -0,0 +1,12 @@
+"""ASGI entry point (optional dependencies: asgiref, httpx and an ASGI server).
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 2
+
+OpenWeather-bound routes fetch upstream data on the event loop; the Flask views run on worker
+threads (at most ASGI_WSGI_THREADS at once). `python app.py` keeps the plain WSGI development
+server.
+"""
+from app import create_app
+from utils.asgi import AsyncGateway
+
+app = AsyncGateway(create_app())
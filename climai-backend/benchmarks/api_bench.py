@@ -0,0 +1,252 @@
+"""End-to-end API benchmark: every dashboard endpoint at several concurrency levels, offline.
+
+Run from the backend directory:
+
+    python -m benchmarks.api_bench --json bench_api.json
+    python -m benchmarks.api_bench --concurrency 1,8,32 --requests 500 --compare bench_api.json
+    python -m benchmarks.api_bench --mongo-uri mongodb://localhost:27017 --endpoints predict,history
+
+The app runs in-process (Flask test clients, one per worker thread) against mongomock (or a
+local mongod with --mongo-uri), the OpenWeather and Gemini stand-ins from fakes.py and a small
+sklearn model trained into a temporary MODEL_DIR. Reports throughput and p50/p95/p99 per
+endpoint and concurrency level; --compare prints the change against an earlier JSON report.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fakes import LIFTED_GEMINI_LIMITS, FakeGemini, FakeOpenWeather, write_tiny_model  # noqa: E402
+from benchmarks.stats import summarize_ms  # noqa: E402
+
+PREDICT_PAYLOAD = {
+    "transport": "car", "vehicleType": "petrol", "monthlyKm": 500, "flightFrequency": "rarely",
+    "heatingSource": "gas", "electricityUsage": "medium", "wasteRecycling": True, "wasteBagSize": "medium",
+    "wasteBagsPerWeek": 2, "diet": "balanced", "showerFrequency": "daily", "newClothesMonthly": 2,
+    "screenTimeDaily": 4,
+}
+CALCULATE_PAYLOAD = {
+    "travel": {"transport": "car", "vehicleType": "petrol", "monthlyKm": 800, "flightFrequency": "occasionally"},
+    "home": {"electricityUsage": "medium", "wasteBagsPerWeek": 2, "wasteBagSize": "medium", "wasteRecycling": True},
+    "lifestyle": {"diet": "balanced", "showerFrequency": "daily", "newClothesMonthly": 3, "screenTimeDaily": 5},
+}
+
+# name -> (method, path, json body, sends the bench user's token). predict writes a row per
+# request, so it runs last to keep the history size constant for the read endpoints.
+ENDPOINTS: Dict[str, Tuple[str, str, Optional[Dict[str, Any]], bool]] = {
+    "calculate": ("POST", "/api/carbon/calculate", CALCULATE_PAYLOAD, False),
+    "impact": ("GET", "/api/carbon/impact", None, True),
+    "history": ("GET", "/api/carbon/history", None, True),
+    "region_climate": ("GET", "/api/region/climate", None, True),
+    "region_critical": ("GET", "/api/region/critical", None, True),
+    "weather": ("GET", "/api/weather", None, True),
+    "chat_ask": ("POST", "/api/chat/ask", {"message": "How can I cut my household emissions this winter?", "history": []}, True),
+    "predict": ("POST", "/api/carbon/predict", PREDICT_PAYLOAD, True),
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _setup(args: argparse.Namespace, model_dir: str):
+    # Offline configuration must be in place before the app loads .env (override=False).
+    os.environ["MONGO_URI"] = args.mongo_uri or ""
+    os.environ["MODEL_DIR"] = model_dir
+    os.environ["OPENWEATHER_API_KEY"] = "offline-bench"
+    os.environ["GEMINI_API_KEY"] = "offline-bench"
+    if not args.gemini_limits:
+        os.environ.update(LIFTED_GEMINI_LIMITS)
+    write_tiny_model(model_dir)
+
+    from app import create_app
+    from routes import chat
+    from utils import db
+
+    gemini = FakeGemini(args.gemini_latency)
+    chat.set_gemini_backend(gemini)
+    app = create_app()
+    if not args.mongo_uri:
+        import mongomock
+
+        db.use_client(mongomock.MongoClient(), db_name="climai_bench")
+    else:
+        db.get_client().drop_database(os.getenv("MONGO_DB", "climai"))
+        db.init_mongo(ping=True)
+    return app, gemini
+
+
+def _seed(app, history_size: int) -> str:
+    client = app.test_client()
+    resp = client.post("/api/auth/signup", json={
+        "name": "Bench", "email": f"bench-{int(time.time() * 1000)}@example.com", "password": "bench-pass-1", "city": "Karachi",
+    })
+    if resp.status_code != 201:
+        raise RuntimeError(f"signup failed: {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+    token = resp.get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(history_size):
+        client.post("/api/carbon/predict", json=PREDICT_PAYLOAD, headers=headers)
+    return token
+
+
+def _measure(app, name: str, token: str, concurrency: int, total: int, warmup: int) -> Dict[str, Any]:
+    method, path, body, auth = ENDPOINTS[name]
+    headers = {"Authorization": f"Bearer {token}"} if auth else {}
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+    remaining = [total]
+
+    def call(client) -> Tuple[float, int]:
+        t0 = time.perf_counter()
+        resp = client.open(path, method=method, json=body, headers=headers)
+        resp.get_data()
+        return time.perf_counter() - t0, resp.status_code
+
+    def worker() -> None:
+        client = app.test_client()
+        local: List[Tuple[float, int]] = []
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            local.append(call(client))
+        with lock:
+            for seconds, status in local:
+                latencies.append(seconds)
+                statuses[status] += 1
+
+    warm = app.test_client()
+    for _ in range(warmup):
+        call(warm)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for f in [pool.submit(worker) for _ in range(concurrency)]:
+            f.result()
+    wall = time.perf_counter() - started
+
+    return {
+        "endpoint": name,
+        "method": method,
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(n for status, n in statuses.items() if status >= 400),
+        "statusCodes": {str(k): v for k, v in sorted(statuses.items())},
+        "throughputRps": round(len(latencies) / wall, 2) if wall > 0 else None,
+        "latency": summarize_ms(latencies),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    names = [n.strip() for n in args.endpoints.split(",") if n.strip()] if args.endpoints else list(ENDPOINTS)
+    unknown = [n for n in names if n not in ENDPOINTS]
+    if unknown:
+        raise SystemExit(f"unknown endpoints: {', '.join(unknown)} (choose from {', '.join(ENDPOINTS)})")
+    names.sort(key=list(ENDPOINTS).index)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    weather = FakeOpenWeather(args.weather_latency)
+    with tempfile.TemporaryDirectory(prefix="climai-bench-model-") as model_dir, weather.installed():
+        app, gemini = _setup(args, model_dir)
+        token = _seed(app, args.history_size)
+        results = []
+        for name in names:
+            for level in levels:
+                res = _measure(app, name, token, level, args.requests, args.warmup)
+                results.append(res)
+                lat = res["latency"]
+                print(f"{name:<16} c={level:<4} rps={res['throughputRps']:<9} p50={lat['p50Ms']:<9} "
+                      f"p95={lat['p95Ms']:<9} p99={lat['p99Ms']:<9} errors={res['errors']}", flush=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "createdAt": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            "concurrency": levels,
+            "requestsPerLevel": args.requests,
+            "warmup": args.warmup,
+            "historySize": args.history_size,
+            "mongo": "local" if args.mongo_uri else "mongomock",
+            "weatherLatencyMs": args.weather_latency,
+            "geminiLatencyMs": args.gemini_latency,
+            "geminiLimits": "configured" if args.gemini_limits else "lifted",
+        },
+        "upstreamCalls": {"gemini": gemini.calls, "openweather": dict(weather.calls)},
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["endpoint"], r["concurrency"]): r for r in baseline.get("results", [])}
+    print(f"\nvs {baseline_path} (commit {baseline.get('meta', {}).get('commit')}):")
+    print(f"{'endpoint':<16}{'c':>5}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+
+    def pct(new: Optional[float], old: Optional[float]) -> str:
+        if not new or not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    matched = 0
+    for r in report["results"]:
+        old = before.get((r["endpoint"], r["concurrency"]))
+        if old is None:
+            continue
+        matched += 1
+        print(f"{r['endpoint']:<16}{r['concurrency']:>5}{pct(r['throughputRps'], old['throughputRps']):>10}"
+              + "".join(f"{pct(r['latency'][k], old['latency'][k]):>10}" for k in ("p50Ms", "p95Ms", "p99Ms")))
+    if not matched:
+        print("(no endpoint/concurrency pairs in common)")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--concurrency", default="1,4,16", help="comma-separated worker thread counts")
+    ap.add_argument("--requests", type=int, default=200, help="measured requests per endpoint and level")
+    ap.add_argument("--warmup", type=int, default=5, help="unmeasured requests per endpoint and level")
+    ap.add_argument("--endpoints", help=f"comma-separated subset of: {', '.join(ENDPOINTS)}")
+    ap.add_argument("--history-size", type=int, default=50, help="predictions stored for the bench user up front")
+    ap.add_argument("--mongo-uri", help="local mongod to use instead of mongomock (its MONGO_DB is dropped first)")
+    ap.add_argument("--weather-latency", type=float, default=50.0, help="stand-in OpenWeather latency (ms)")
+    ap.add_argument("--gemini-latency", type=float, default=400.0, help="stand-in Gemini latency (ms)")
+    ap.add_argument("--gemini-limits", action="store_true", help="keep the configured GEMINI_* rate limits (default: lifted)")
+    ap.add_argument("--json", dest="json_out", help="write the full report to this path")
+    ap.add_argument("--compare", help="earlier --json report to diff against")
+    args = ap.parse_args()
+
+    report = run(args)
+    if args.compare:
+        compare(report, args.compare)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare the scalar and batch rule-based calculators on synthetic households.
+
+Run from the backend directory:
+
+    python -m benchmarks.calc_bench --households 100000
+    python -m benchmarks.calc_bench --households 20000 --edge-cases
+
+Checks that every batch result is bit-for-bit identical to calculate_footprint (exit code 1
+otherwise) and reports the time taken by each path.
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from utils.carbon_calc import EMISSION_FACTORS, calculate_footprint, calculate_footprints_batch  # noqa: E402
+
+# Awkward inputs the API accepts: numeric strings, blanks, negatives, huge and non-finite numbers
+EDGE_NUMBERS = [0, None, "", "12.5", -0.0, -3, 1e300, 1e17, 0.005, 2.675, 1.115, float("nan"), float("inf")]
+
+
+def synth_households(n: int, seed: int, edge_cases: bool) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+
+    def pick(options):
+        options = list(options)
+        return rng.choice(options + ["unknown", None] if edge_cases else options)
+
+    def number(hi: int):
+        if edge_cases and rng.random() < 0.15:
+            return rng.choice(EDGE_NUMBERS)
+        return rng.randint(0, hi) if rng.random() < 0.7 else round(rng.uniform(0, hi), 2)
+
+    out = []
+    for _ in range(n):
+        out.append({
+            "travel": {
+                "transport": pick(["car", "public", "bike", "walk"]),
+                "vehicleType": pick(EMISSION_FACTORS["transport"]["car"]),
+                "monthlyKm": number(3000),
+                "flightFrequency": pick(EMISSION_FACTORS["flights"]),
+            },
+            "home": {
+                "electricityUsage": pick(EMISSION_FACTORS["electricity"]),
+                "wasteBagsPerWeek": number(6),
+                "wasteBagSize": pick(EMISSION_FACTORS["waste"]),
+                "wasteRecycling": rng.random() < 0.5,
+            },
+            "lifestyle": {
+                "diet": pick(EMISSION_FACTORS["diet"]),
+                "showerFrequency": pick(EMISSION_FACTORS["water"]),
+                "newClothesMonthly": number(10),
+                "screenTimeDaily": number(14),
+            },
+        })
+    return out
+
+
+def _bits(value: Any) -> Any:
+    if isinstance(value, float):
+        return "nan" if value != value else struct.pack("<d", value)
+    if isinstance(value, dict):
+        return {k: _bits(v) for k, v in value.items()}
+    return value
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--households", type=int, default=100000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--edge-cases", action="store_true", help="mix in unknown categories and odd numbers")
+    args = ap.parse_args()
+
+    households = synth_households(args.households, args.seed, args.edge_cases)
+
+    t0 = time.perf_counter()
+    scalar = [calculate_footprint(h) for h in households]
+    t1 = time.perf_counter()
+    batch = calculate_footprints_batch(households)
+    t2 = time.perf_counter()
+
+    mismatches = [i for i, (a, b) in enumerate(zip(scalar, batch)) if _bits(a) != _bits(b)]
+    print(f"households={len(households)} scalar={t1 - t0:.3f}s batch={t2 - t1:.3f}s "
+          f"speedup={(t1 - t0) / max(t2 - t1, 1e-9):.1f}x mismatches={len(mismatches)}")
+    if mismatches:
+        i = mismatches[0]
+        print(f"first mismatch #{i}: scalar={scalar[i]} batch={batch[i]} input={households[i]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
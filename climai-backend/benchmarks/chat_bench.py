@@ -0,0 +1,172 @@
+"""Replay a corpus of chat questions through /api/chat/ask with offline stand-ins.
+
+Run from the backend directory:
+
+    python -m benchmarks.chat_bench --iterations 5 --gemini-latency 300 --gemini-fail-rate 0.2
+    python -m benchmarks.chat_bench --no-gemini --alloc --json bench_chat.json
+
+The GEMINI_* admission limits are lifted so every call reaches the Gemini stand-in;
+--gemini-limits keeps the configured ones (and measures how much the limiter sheds).
+
+Reports per-intent latency percentiles, answer-source distribution and (with --alloc)
+per-request memory allocation figures from tracemalloc.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fakes import LIFTED_GEMINI_LIMITS, FakeGemini, FakeOpenWeather  # noqa: E402
+from benchmarks.stats import summarize_ms  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "chat_corpus.jsonl")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    return rows
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Offline configuration must be in place before the app loads .env (override=False).
+    os.environ["MONGO_URI"] = ""
+    os.environ["OPENWEATHER_API_KEY"] = "offline-bench"
+    os.environ["GEMINI_API_KEY"] = "" if args.no_gemini else "offline-bench"
+    os.environ["CHAT_DEADLINE_SECONDS"] = str(args.deadline)
+    if not args.gemini_limits:
+        os.environ.update(LIFTED_GEMINI_LIMITS)
+
+    from app import create_app
+    from routes import chat
+
+    gemini = FakeGemini(args.gemini_latency, args.gemini_jitter, args.gemini_fail_rate)
+    chat.set_gemini_backend(gemini)
+    weather = FakeOpenWeather(args.weather_latency)
+
+    app = create_app()
+    client = app.test_client()
+    corpus = load_corpus(args.corpus)
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    sources: Dict[str, Counter] = defaultdict(Counter)
+    alloc_peak: Dict[str, List[int]] = defaultdict(list)
+    alloc_blocks: Dict[str, List[int]] = defaultdict(list)
+    errors = 0
+
+    with weather.installed():
+        for row in corpus[: args.warmup]:
+            client.post("/api/chat/ask", json={"message": row["message"], "history": row.get("history", [])})
+
+        if args.alloc:
+            tracemalloc.start()
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            for row in corpus:
+                body = {"message": row["message"], "history": row.get("history", [])}
+                if args.alloc:
+                    tracemalloc.reset_peak()
+                    base, _ = tracemalloc.get_traced_memory()
+                    blocks_before = sys.getallocatedblocks()
+                t0 = time.perf_counter()
+                resp = client.post("/api/chat/ask", json=body)
+                elapsed = time.perf_counter() - t0
+                if args.alloc:
+                    _, peak = tracemalloc.get_traced_memory()
+                    alloc_peak[row["intent"]].append(peak - base)
+                    alloc_blocks[row["intent"]].append(sys.getallocatedblocks() - blocks_before)
+                if resp.status_code != 200:
+                    errors += 1
+                    continue
+                latencies[row["intent"]].append(elapsed)
+                sources[row["intent"]][resp.get_json().get("source", "unknown")] += 1
+        wall = time.perf_counter() - started
+        if args.alloc:
+            tracemalloc.stop()
+
+    total = sum(len(v) for v in latencies.values())
+    report: Dict[str, Any] = {
+        "config": {
+            "iterations": args.iterations,
+            "gemini": None if args.no_gemini else {
+                "latencyMs": args.gemini_latency,
+                "jitterMs": args.gemini_jitter,
+                "failRate": args.gemini_fail_rate,
+            },
+            "weatherLatencyMs": args.weather_latency,
+            "deadlineSeconds": args.deadline,
+            "geminiLimits": "configured" if args.gemini_limits else "lifted",
+        },
+        "requests": total,
+        "errors": errors,
+        "throughputRps": round(total / wall, 2) if wall > 0 else None,
+        "overall": summarize_ms([x for v in latencies.values() for x in v]),
+        "sources": dict(sum(sources.values(), Counter())),
+        "intents": {},
+        "upstreamCalls": {"gemini": gemini.calls, "openweather": dict(weather.calls)},
+        "geminiPromptChars": {
+            "mean": round(sum(gemini.prompt_chars) / len(gemini.prompt_chars), 1) if gemini.prompt_chars else 0.0,
+            "max": max(gemini.prompt_chars) if gemini.prompt_chars else 0,
+        },
+    }
+    for intent in sorted(latencies):
+        entry: Dict[str, Any] = {"latency": summarize_ms(latencies[intent]), "sources": dict(sources[intent])}
+        if args.alloc:
+            peaks = alloc_peak[intent]
+            entry["alloc"] = {
+                "meanPeakKiB": round(sum(peaks) / len(peaks) / 1024.0, 1) if peaks else 0.0,
+                "maxPeakKiB": round(max(peaks) / 1024.0, 1) if peaks else 0.0,
+                "meanNetBlocks": round(sum(alloc_blocks[intent]) / len(alloc_blocks[intent]), 1) if alloc_blocks[intent] else 0.0,
+            }
+        report["intents"][intent] = entry
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    o = report["overall"]
+    print(f"requests={report['requests']} errors={report['errors']} throughput={report['throughputRps']} req/s")
+    print(f"overall p50={o['p50Ms']}ms p95={o['p95Ms']}ms p99={o['p99Ms']}ms  sources={report['sources']}")
+    print(f"{'intent':<20}{'n':>5}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}  sources / alloc")
+    for intent, entry in report["intents"].items():
+        lat = entry["latency"]
+        extra = f"  peak={entry['alloc']['meanPeakKiB']}KiB" if "alloc" in entry else ""
+        print(f"{intent:<20}{lat['count']:>5}{lat['p50Ms']:>10}{lat['p95Ms']:>10}{lat['p99Ms']:>10}  {entry['sources']}{extra}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--corpus", default=DEFAULT_CORPUS)
+    ap.add_argument("--iterations", type=int, default=3)
+    ap.add_argument("--warmup", type=int, default=5, help="corpus rows replayed before measuring")
+    ap.add_argument("--no-gemini", action="store_true", help="measure the rule-based path only")
+    ap.add_argument("--gemini-latency", type=float, default=400.0, help="stand-in Gemini latency (ms)")
+    ap.add_argument("--gemini-jitter", type=float, default=0.0, help="+/- jitter on Gemini latency (ms)")
+    ap.add_argument("--gemini-limits", action="store_true", help="keep the configured GEMINI_* rate limits (default: lifted)")
+    ap.add_argument("--gemini-fail-rate", type=float, default=0.0, help="fraction of Gemini calls returning nothing")
+    ap.add_argument("--weather-latency", type=float, default=50.0, help="stand-in OpenWeather latency (ms)")
+    ap.add_argument("--deadline", type=float, default=8.0, help="CHAT_DEADLINE_SECONDS for the run")
+    ap.add_argument("--alloc", action="store_true", help="record tracemalloc figures (slows requests)")
+    ap.add_argument("--json", dest="json_out", help="write the full report to this path")
+    args = ap.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Offline stand-ins for the upstream services the backend calls."""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+import requests
+
+# GEMINI_* gate settings that admit every benchmark call, so a run times the Gemini path itself
+# rather than the limiter's rule-based fallback. Apply before routes.chat is imported.
+LIFTED_GEMINI_LIMITS = {
+    "GEMINI_RATE_PER_SEC": "1e6",
+    "GEMINI_BURST": "1e6",
+    "GEMINI_USER_RATE_PER_MIN": "1e8",
+    "GEMINI_USER_BURST": "1e6",
+    "GEMINI_MAX_CONCURRENT": "1024",
+}
+
+
+class FakeGemini:
+    """Gemini backend stand-in for ``routes.chat.set_gemini_backend``.
+
+    Sleeps for ``latency_ms`` (+/- ``jitter_ms``) and returns a canned answer, or None
+    with probability ``fail_rate`` to exercise the rule-based fallback.
+    """
+
+    def __init__(self, latency_ms: float = 400.0, jitter_ms: float = 0.0, fail_rate: float = 0.0, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_chars: List[int] = []
+
+    def __call__(self, model_name: str, system_instruction: str, prompt: str) -> Optional[str]:
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars.append(len(system_instruction) + len(prompt))
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            fail = self._rng.random() < self.fail_rate
+        time.sleep(delay)
+        if fail:
+            return None
+        return "Here is a concise climate answer from the stand-in model. Cut emissions where you can."
+
+
+class _FakeResponse:
+    def __init__(self, payload: Any, status: int = 200):
+        self._payload = payload
+        self.status_code = status
+
+    def json(self) -> Any:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            err = requests.exceptions.HTTPError(f"{self.status_code} from fake OpenWeather")
+            err.response = self  # type: ignore[attr-defined]
+            raise err
+
+
+class FakeOpenWeather:
+    """Replacement for ``requests.get`` that answers the OpenWeather endpoints we use.
+
+    Values are deterministic per city so repeated runs return identical payloads.
+    """
+
+    def __init__(self, latency_ms: float = 50.0):
+        self.latency_ms = latency_ms
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._real_get = requests.get
+
+    def __call__(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        if "openweathermap.org" not in url:
+            return self._real_get(url, params=params, **kwargs)
+        params = params or {}
+        kind = url.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+        time.sleep(self.latency_ms / 1000.0)
+
+        seed = sum(ord(c) for c in str(params.get("q") or f"{params.get('lat')},{params.get('lon')}").lower())
+        if kind == "direct":
+            return _FakeResponse([{"lat": 20.0 + seed % 15, "lon": 60.0 + seed % 20}])
+        if kind == "air_pollution":
+            return _FakeResponse({"list": [{"main": {"aqi": 1 + seed % 5}}]})
+        if kind == "weather":
+            return _FakeResponse({
+                "main": {"temp": 15.0 + seed % 25, "humidity": 30 + seed % 60},
+                "weather": [{"description": "clear sky"}],
+            })
+        return _FakeResponse({}, status=404)
+
+    @contextmanager
+    def installed(self):
+        with mock.patch.object(requests, "get", self):
+            yield self
+
+
+def write_tiny_model(model_dir: str, rows: int = 200, seed: int = 0) -> None:
+    """Train a small LinearRegression on the model's feature names and save it (with label
+    encoders) to ``model_dir`` in the layout utils.model_artifacts loads."""
+    import joblib
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import LabelEncoder
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Body Type": rng.choice(["Petrol", "Diesel", "Hybrid", "Electric"], rows),
+        "Diet": rng.choice(["Balanced", "Vegan", "Vegetarian", "Meat Heavy"], rows),
+        "Monthly Km": rng.uniform(0, 2000, rows),
+        "Waste Bags Per Week": rng.integers(0, 6, rows).astype(float),
+    })
+    y = df["Monthly Km"] * 0.2 + df["Waste Bags Per Week"] * 20 + 200
+    encoders = {}
+    for col in ("Body Type", "Diet"):
+        encoders[col] = LabelEncoder().fit(df[col])
+        df[col] = encoders[col].transform(df[col])
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(LinearRegression().fit(df, y), os.path.join(model_dir, "model.pkl"))
+    joblib.dump(encoders, os.path.join(model_dir, "encoder.pkl"))
@@ -0,0 +1,118 @@
+"""Cold-start profile of create_app() in each STARTUP_MODE, using ``python -X importtime``.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup_profile
+    python -m benchmarks.startup_profile --modes lazy --top 25 --json startup.json
+
+Each mode is measured in a fresh interpreter (offline: no MONGO_URI, stand-in Gemini key).
+Reports time until create_app() returns, until the first /api/health response and until
+/api/ready turns 200, plus the slowest imports by cumulative time.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Runs inside the child interpreter; prints one JSON line with the timings.
+_CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+app_obj = app.create_app()
+t_app = time.perf_counter()
+client = app_obj.test_client()
+client.get("/api/health")
+t_first = time.perf_counter()
+deadline = t0 + 120
+while client.get("/api/ready").status_code != 200 and time.perf_counter() < deadline:
+    time.sleep(0.01)
+t_ready = time.perf_counter()
+print("STARTUP_PROFILE " + json.dumps({
+    "createAppMs": round((t_app - t0) * 1000, 1),
+    "firstResponseMs": round((t_first - t0) * 1000, 1),
+    "readyMs": round((t_ready - t0) * 1000, 1),
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of ``-X importtime`` output as {module, selfUs, cumulativeUs, depth}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            head, cumulative_us, name = line.split("|")
+            self_us = head.split(":", 1)[1]
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append({
+            "module": name.strip(),
+            "selfUs": int(self_us.strip()),
+            "cumulativeUs": int(cumulative_us.strip()),
+            "depth": depth,
+        })
+    return rows
+
+
+def profile_mode(mode: str, top: int) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.update({"STARTUP_MODE": mode, "MONGO_URI": "", "GEMINI_API_KEY": env.get("GEMINI_API_KEY") or "offline-bench"})
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    timings: Dict[str, Any] = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP_PROFILE "):
+            timings = json.loads(line.split(" ", 1)[1])
+    if not timings:
+        raise RuntimeError(f"{mode} run failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+    slowest = sorted(rows, key=lambda r: r["cumulativeUs"], reverse=True)[:top]
+    heavy = {m: any(r["module"] == m for r in rows) for m in ("pandas", "sklearn", "google.generativeai", "numpy")}
+    return {
+        "mode": mode,
+        **timings,
+        "modulesImported": len(rows),
+        "importTotalMs": round(sum(r["selfUs"] for r in rows) / 1000.0, 1),
+        "heavyModulesLoadedByReady": heavy,
+        "slowestImports": [
+            {"module": r["module"], "cumulativeMs": round(r["cumulativeUs"] / 1000.0, 1), "selfMs": round(r["selfUs"] / 1000.0, 1)}
+            for r in slowest
+        ],
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    for res in results:
+        print(f"[{res['mode']}] create_app={res['createAppMs']}ms first-response={res['firstResponseMs']}ms "
+              f"ready={res['readyMs']}ms imports={res['modulesImported']} ({res['importTotalMs']}ms self time)")
+        print(f"  heavy modules loaded by ready: {', '.join(m for m, v in res['heavyModulesLoadedByReady'].items() if v) or 'none'}")
+        for row in res["slowestImports"]:
+            print(f"  {row['cumulativeMs']:>9.1f}ms  {row['module']}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--modes", default="eager,lazy", help="comma-separated STARTUP_MODE values")
+    ap.add_argument("--top", type=int, default=15, help="slowest imports to list per mode")
+    ap.add_argument("--json", dest="json_out", help="write the full report to this path")
+    args = ap.parse_args()
+
+    results = [profile_mode(m.strip(), args.top) for m in args.modes.split(",") if m.strip()]
+    print_report(results)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
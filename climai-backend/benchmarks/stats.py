@@ -0,0 +1,25 @@
+from typing import Dict, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0-100) of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize_ms(seconds: List[float]) -> Dict[str, float]:
+    """Count, mean and tail percentiles of a list of durations, reported in milliseconds."""
+    ms = [s * 1000.0 for s in seconds]
+    return {
+        "count": len(ms),
+        "meanMs": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50Ms": round(percentile(ms, 50), 3),
+        "p95Ms": round(percentile(ms, 95), 3),
+        "p99Ms": round(percentile(ms, 99), 3),
+        "maxMs": round(max(ms), 3) if ms else 0.0,
+    }
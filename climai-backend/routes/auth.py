@@ -2,14 +2,38 @@ from flask import Blueprint, request, current_app
 from utils.helpers import json_response, error_response
 from utils.db import get_collections
 from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
-from utils.auth import hash_password, verify_password, create_access_token, decode_token
-from bson.objectid import ObjectId
+from utils.auth import create_access_token
+from utils.hash_pool import hash_pool, HashPoolBusy, HashPoolTimeout
+from utils.user_context import current_user, load_profile, profile_cache
 import traceback
 from datetime import datetime
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def _busy_response():
+    resp, status = error_response("Too many sign-in attempts in progress, please retry shortly", 429)
+    resp.headers["Retry-After"] = "1"
+    return resp, status
+
+
+def _timeout_response():
+    resp, status = error_response("Sign-in is taking longer than usual, please retry shortly", 503)
+    resp.headers["Retry-After"] = "5"
+    return resp, status
+
+
+def _rehash_password(users, user_id, password: str) -> None:
+    """Replace a legacy/weaker hash after a successful login. Best effort: failures keep the old hash."""
+    try:
+        users.update_one({"_id": user_id}, {"$set": {"password_hash": hash_pool.hash(password)}})
+        hash_pool.record_rehash()
+    except HashPoolBusy:
+        pass
+    except Exception as e:
+        current_app.logger.warning("Password rehash failed for %s: %s", user_id, e)
+
+
 @auth_bp.post("/signup")
 def signup():
     data = request.get_json(silent=True) or {}
@@ -31,7 +55,7 @@ def signup():
     # ✅ Check if email already registered
     try:
         current_app.logger.info("Signup attempt email=%s", email)
-        if users.find_one({"email": email}):
+        if users.find_one({"email": email}, {"_id": 1}):
             return error_response("Email already registered", 409)
     except ServerSelectionTimeoutError:
         current_app.logger.exception("Mongo timeout on find_one during signup for %s", email)
@@ -46,7 +70,11 @@ def signup():
         if len(password.encode("utf-8")) > 72:
             password = password[:72]
 
-        password_hash = hash_password(password)
+        password_hash = hash_pool.hash(password)
+    except HashPoolBusy:
+        return _busy_response()
+    except HashPoolTimeout:
+        return _timeout_response()
     except Exception as e:
         current_app.logger.exception("Password hashing failed for %s: %s", email, e)
         return error_response("Internal error hashing password", 500)
@@ -74,7 +102,7 @@ def signup():
         return error_response(f"Signup failed: {e}", 500)
 
     # ✅ Create token
-    token = create_access_token(user_id, email)
+    token = create_access_token(user_id, email, profile={"name": name, "city": city})
     current_app.logger.info("Signup success email=%s id=%s", email, user_id)
 
     return json_response({
@@ -100,7 +128,7 @@ def login():
 
     try:
         current_app.logger.info("Login attempt email=%s", email)
-        user = users.find_one({"email": email})
+        user = users.find_one({"email": email}, {"name": 1, "city": 1, "password_hash": 1})
     except ServerSelectionTimeoutError:
         current_app.logger.exception("Mongo timeout on find_one during login for %s", email)
         return error_response("Database unreachable (timeout)", 503)
@@ -108,10 +136,23 @@ def login():
         current_app.logger.exception("Mongo error on find_one during login for %s: %s", email, e)
         return error_response(f"Database error: {e}", 503)
 
-    if not user or not verify_password(password, user.get("password_hash", "")):
+    if not user:
         return error_response("Invalid credentials", 401)
+    try:
+        valid, needs_update = hash_pool.verify(password, user.get("password_hash", ""))
+    except HashPoolBusy:
+        return _busy_response()
+    except HashPoolTimeout:
+        return _timeout_response()
+    except Exception as e:
+        current_app.logger.exception("Password verification failed for %s: %s", email, e)
+        return error_response("Internal error verifying password", 500)
+    if not valid:
+        return error_response("Invalid credentials", 401)
+    if needs_update:
+        _rehash_password(users, user["_id"], password)
 
-    token = create_access_token(str(user["_id"]), email)
+    token = create_access_token(str(user["_id"]), email, profile=user)
     current_app.logger.info("Login success email=%s id=%s", email, str(user["_id"]))
 
     return json_response({
@@ -122,28 +163,81 @@ def login():
 
 @auth_bp.get("/me")
 def me():
-    auth = request.headers.get("Authorization", "")
-    if not auth.startswith("Bearer "):
-        return error_response("Missing bearer token", 401)
-
-    token = auth.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
+    user = current_user()
+    if not user.claims:
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return error_response("Missing bearer token", 401)
         return error_response("Invalid or expired token", 401)
 
+    if not get_collections():
+        return error_response("Database not configured", 503)
+
+    profile = user.profile
+    if not profile:
+        return error_response("User not found", 404)
+
+    return json_response(dict(profile))
+
+
+@auth_bp.patch("/me")
+def update_me():
+    """PATCH /api/auth/me: update the caller's name and/or city.
+
+    Body: { name?, city? }. Returns the updated profile.
+    """
+    user = current_user()
+    if not user.claims:
+        return error_response("Invalid or missing token", 401)
+
+    data = request.get_json(silent=True) or {}
+    updates = {}
+    for field in ("name", "city"):
+        if field in data:
+            value = (data.get(field) or "").strip()
+            if not value:
+                return error_response(f"{field.capitalize()} cannot be empty", 400)
+            updates[field] = value
+    if not updates:
+        return error_response("Nothing to update (name, city)", 400)
+
     cols = get_collections()
     if not cols:
         return error_response("Database not configured", 503)
 
-    users = cols["users"]
-    user = users.find_one({"_id": ObjectId(payload["sub"])})
+    try:
+        res = cols["users"].update_one({"_id": user.object_id}, {"$set": updates})
+    except Exception as e:
+        current_app.logger.exception("Profile update failed for %s: %s", user.user_id, e)
+        return error_response(f"Database error: {e}", 503)
+    finally:
+        profile_cache.invalidate(user.user_id)
+    if res.matched_count == 0:
+        return error_response("User not found", 404)
 
-    if not user:
+    profile = load_profile(user.user_id)
+    if not profile:
         return error_response("User not found", 404)
+    # The old token still carries the previous name/city; hand back one with the new claims.
+    token = create_access_token(user.user_id, profile.get("email") or user.claims.get("email"), profile=profile)
+    return json_response(dict(profile, token=token))
 
-    return json_response({
-        "id": str(user["_id"]),
-        "name": user.get("name"),
-        "email": user.get("email"),
-        "city": user.get("city"),
-    })
+
+@auth_bp.post("/refresh")
+def refresh():
+    """POST /api/auth/refresh: re-issue the caller's token with current profile claims.
+
+    Response: { token, user }
+    """
+    user = current_user()
+    if not user.claims:
+        return error_response("Invalid or missing token", 401)
+    if not get_collections():
+        return error_response("Database not configured", 503)
+
+    profile_cache.invalidate(user.user_id)
+    profile = user.profile
+    if not profile:
+        return error_response("User not found", 404)
+
+    token = create_access_token(user.user_id, profile.get("email") or user.claims.get("email"), profile=profile)
+    return json_response({"token": token, "user": dict(profile)})
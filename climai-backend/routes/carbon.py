@@ -1,4 +1,6 @@
-from flask import Blueprint, request, current_app
+import os
+import base64
+from flask import Blueprint, Response, request, current_app, stream_with_context
 from utils.helpers import json_response, error_response
 from utils.model_artifacts import (
     get_all,
@@ -7,107 +9,91 @@ from utils.model_artifacts import (
     artifacts_ready,
     get_expected_feature_names_for_model,
     align_payload_to_expected,
+    align_payloads_to_expected,
+    apply_label_encoders,
 )
 from utils.auth import decode_token
 from utils.db import get_collections
+from utils.carbon_rollups import record_predictions, discard_rollup, get_rollup, bucket_series
+from utils.series import lttb
+from utils.write_behind import PartialWriteError, WriteBehindQueue
+from utils.metrics import span
+from utils.http_cache import conditional, make_etag, not_modified
+from utils.carbon_calc import (
+    calculate_footprint,
+    calculate_footprints_batch,
+    default_changes,
+    evaluate_scenarios,
+    SCENARIO_SECTIONS,
+)
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
 from datetime import datetime
-import pandas as pd
 from math import isfinite, tanh
 
 carbon_bp = Blueprint("carbon", __name__)
 
-# Emission factors (kg CO2) — aligned with the frontend calculator
-EMISSION_FACTORS = {
-    "transport": {
-        "car": {
-            "petrol": 0.192,  # per km
-            "diesel": 0.171,
-            "electric": 0.047,
-            "hybrid": 0.109,
-        },
-        "public": 0.089,  # per km
-        "bike": 0,
-        "walk": 0,
-    },
-    "flights": {
-        "never": 0,
-        "rarely": 300,  # per year
-        "sometimes": 900,
-        "frequently": 2400,
-    },
-    "electricity": {
-        "low": 150,  # monthly kg CO2
-        "medium": 300,
-        "high": 500,
-    },
-    "waste": {
-        "small": 15,  # per bag per week
-        "medium": 25,
-        "large": 40,
-    },
-    "recycling": {"multiplier": 0.7},  # 30% reduction
-    "diet": {
-        "meat-heavy": 3300,  # annual kg CO2
-        "balanced": 2500,
-        "vegetarian": 1700,
-        "vegan": 1500,
-    },
-    "water": {  # monthly kg CO2
-        "twice-daily": 50,
-        "daily": 35,
-        "every-other": 20,
-    },
-    "clothing": 22,  # per item
-    "screenTime": 0.6,  # per hour daily (monthly)
-}
-
-
-def calculate_travel_emissions(data: dict) -> float:
-    emissions = 0.0
-    transport = data.get("transport")
-    monthly_km = float(data.get("monthlyKm", 0) or 0)
-
-    if transport == "car":
-        vehicle = data.get("vehicleType")
-        if vehicle in EMISSION_FACTORS["transport"]["car"]:
-            emissions += monthly_km * EMISSION_FACTORS["transport"]["car"][vehicle]
-    elif transport == "public":
-        emissions += monthly_km * EMISSION_FACTORS["transport"]["public"]
-
-    flights = data.get("flightFrequency", "never")
-    emissions += EMISSION_FACTORS["flights"].get(flights, 0) / 12
-    return round(emissions, 2)
-
-
-def calculate_home_emissions(data: dict) -> float:
-    emissions = 0.0
-    electricity = data.get("electricityUsage", "medium")
-    emissions += EMISSION_FACTORS["electricity"].get(electricity, 300)
-
-    bags_per_week = float(data.get("wasteBagsPerWeek", 0) or 0)
-    bag_size = data.get("wasteBagSize", "medium")
-    waste = bags_per_week * 4.33 * EMISSION_FACTORS["waste"].get(bag_size, 25)
-    if data.get("wasteRecycling", False):
-        waste *= EMISSION_FACTORS["recycling"]["multiplier"]
-    emissions += waste
-    return round(emissions, 2)
-
-
-def calculate_lifestyle_emissions(data: dict) -> float:
-    emissions = 0.0
-    diet = data.get("diet", "balanced")
-    emissions += EMISSION_FACTORS["diet"].get(diet, 2500) / 12
-
-    shower = data.get("showerFrequency", "daily")
-    emissions += EMISSION_FACTORS["water"].get(shower, 35)
-
-    clothes = float(data.get("newClothesMonthly", 0) or 0)
-    emissions += clothes * EMISSION_FACTORS["clothing"]
-
-    screen = float(data.get("screenTimeDaily", 0) or 0)
-    emissions += screen * 30 * EMISSION_FACTORS["screenTime"]
-    return round(emissions, 2)
+def _inserted_docs(col, docs: list, error: BulkWriteError) -> list:
+    """The documents of an unordered insert_many that were written despite ``error``."""
+    failed = {e.get("index") for e in error.details.get("writeErrors", [])}
+    inserted = [d for i, d in enumerate(docs) if i not in failed]
+    if len(inserted) != error.details.get("nInserted", len(inserted)):
+        # Not explained by the per-document errors alone: ask the server which ids exist
+        written = {d["_id"] for d in col.find({"_id": {"$in": [d["_id"] for d in docs]}}, {"_id": 1})}
+        inserted = [d for d in docs if d["_id"] in written]
+    return inserted
+
+
+def _persist_predictions(docs: list) -> None:
+    """Write-behind flush: batch insert predictions, then fold them into per-user rollups.
+
+    If only part of the batch is written, the written documents are still folded in (the
+    rollup backs the /history and /impact ETags) before PartialWriteError is raised. A rollup
+    that cannot be updated is discarded so the next read rebuilds it from history.
+    """
+    cols = get_collections()
+    if cols is None:
+        raise RuntimeError("Database not configured")
+    error = None
+    try:
+        cols["carbon_footprint"].insert_many(docs, ordered=False)
+        inserted = docs
+    except BulkWriteError as e:
+        error = e
+        inserted = _inserted_docs(cols["carbon_footprint"], docs, e)
+    by_user: dict = {}
+    for d in inserted:
+        by_user.setdefault(d["userId"], []).append((d["_id"], d["predicted"], d["created_at"]))
+    fold_error = None
+    for user_id, points in by_user.items():
+        try:
+            record_predictions(cols, user_id, points)
+        except Exception as e:
+            fold_error = fold_error or e
+            discard_rollup(cols, user_id)
+    if error is not None:
+        raise PartialWriteError(len(inserted), str(error)) from error
+    if fold_error is not None:
+        raise fold_error
+
+
+_writer = None
+
+
+def _prediction_writer():
+    """Return the prediction write-behind queue when CARBON_WRITE_BEHIND=1, else None."""
+    global _writer
+    if os.getenv("CARBON_WRITE_BEHIND", "0") != "1":
+        return None
+    if _writer is None:
+        _writer = WriteBehindQueue(
+            "carbon_footprint",
+            _persist_predictions,
+            max_size=int(os.getenv("CARBON_WRITE_BEHIND_MAX_QUEUE", "5000")),
+            batch_size=int(os.getenv("CARBON_WRITE_BEHIND_BATCH", "200")),
+            flush_interval=float(os.getenv("CARBON_WRITE_BEHIND_INTERVAL_SECONDS", "0.5")),
+        )
+    return _writer
 
 
 @carbon_bp.get("/model/health")
@@ -122,8 +108,12 @@ def predict_carbon():
     """Predict carbon emissions using trained model and save result to DB if user is authenticated.
 
     Expects JSON with fields used by your model. Applies encoder/scaler if available, feeds to model.
-    Returns { predicted: float } and persists as a history record for the user when possible.
+    Returns { predicted: float, saved } and persists as a history record for the user when possible.
+    With CARBON_WRITE_BEHIND=1 the record is queued and ``saved`` is "queued"; if the queue is
+    full it is written synchronously as before.
     """
+    import pandas as pd  # deferred so the blueprint imports without the data stack
+
     payload = request.get_json(silent=True) or {}
 
     # Validate basic presence of payload
@@ -147,19 +137,20 @@ def predict_carbon():
     expected = get_expected_feature_names_for_model(model)
     if expected:
         try:
-            X_df = align_payload_to_expected(payload, expected)
-            # Apply label encoders if provided as a dict
-            enc = artifacts.get("encoder")
-            if enc is not None:
-                from utils.model_artifacts import apply_label_encoders
-                X_df = apply_label_encoders(X_df, enc)
-            # Apply scaler if available (assume trained on all features)
-            scaler = artifacts.get("scaler")
-            if scaler is not None and hasattr(scaler, "transform"):
-                X_scaled = pd.DataFrame(scaler.transform(X_df), columns=X_df.columns)
-            else:
-                X_scaled = X_df
-            preds = model.predict(X_scaled)
+            with span("model.align"):
+                X_df = align_payload_to_expected(payload, expected)
+                # Apply label encoders if provided as a dict
+                enc = artifacts.get("encoder")
+                if enc is not None:
+                    X_df = apply_label_encoders(X_df, enc)
+                # Apply scaler if available (assume trained on all features)
+                scaler = artifacts.get("scaler")
+                if scaler is not None and hasattr(scaler, "transform"):
+                    X_scaled = pd.DataFrame(scaler.transform(X_df), columns=X_df.columns)
+                else:
+                    X_scaled = X_df
+            with span("model.predict"):
+                preds = model.predict(X_scaled)
             predicted = float(preds[0])
             prediction_path = "aligned_features"
         except Exception as e1:
@@ -176,7 +167,8 @@ def predict_carbon():
                     X = X_num
             else:
                 X = X_num
-            preds = model.predict(X)
+            with span("model.predict"):
+                preds = model.predict(X)
             predicted = float(preds[0])
             prediction_path = "transformed_matrix"
         except Exception as e2:
@@ -199,10 +191,23 @@ def predict_carbon():
                     "predicted": predicted,
                     "created_at": datetime.utcnow(),
                 }
-                cols["carbon_footprint"].insert_one(doc)
-                saved = True
+                writer = _prediction_writer()
+                if writer is not None and writer.put(doc):
+                    saved = "queued"
+                else:
+                    cols["carbon_footprint"].insert_one(doc)
+                    saved = True
             except Exception as e:
                 current_app.logger.exception("Failed to save prediction: %s", e)
+            if saved is True:
+                try:
+                    record_predictions(cols, doc["userId"], [(doc["_id"], predicted, doc["created_at"])])
+                except Exception as e:
+                    current_app.logger.exception("Failed to update footprint rollup: %s", e)
+                    try:
+                        discard_rollup(cols, doc["userId"])
+                    except Exception as e:
+                        current_app.logger.exception("Failed to discard stale footprint rollup: %s", e)
 
     current_app.logger.info(
         "Carbon model prediction complete - model=%s path=%s predicted=%s saved=%s",
@@ -215,9 +220,79 @@ def predict_carbon():
     return json_response({"predicted": predicted, "saved": saved})
 
 
+HISTORY_FIELDS = ("id", "predicted", "created_at", "input")
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = 500
+
+IMPACT_FIELDS = ("latest", "indices", "trend", "history", "baselineMonthlyKg", "summary")
+
+
+def _encode_cursor(d: dict) -> str:
+    created = d.get("created_at")
+    raw = f"{created.isoformat() if created else ''}|{d['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """Return (created_at, ObjectId) from a history cursor; raises ValueError if malformed."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        ts, oid = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|", 1)
+        return (datetime.fromisoformat(ts) if ts else None), ObjectId(oid)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _keyset_filter(created_at, oid: ObjectId, op: str) -> dict:
+    # Strictly before/after (created_at, _id) in the history sort order
+    return {"$or": [
+        {"created_at": {op: created_at}},
+        {"created_at": created_at, "_id": {op: oid}},
+    ]}
+
+
+def _requested_fields(allowed: tuple) -> tuple:
+    """Names listed in the ``fields`` query param (all of ``allowed`` when absent).
+
+    Raises ValueError naming any field not in ``allowed``.
+    """
+    raw_fields = request.args.get("fields")
+    if not raw_fields:
+        return allowed
+    fields = tuple(f.strip() for f in raw_fields.split(",") if f.strip())
+    unknown = [f for f in fields if f not in allowed]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown) or raw_fields}")
+    return fields
+
+
+def _history_item(d: dict, fields) -> dict:
+    item = {}
+    if "id" in fields:
+        item["id"] = d.get("_id")
+    if "predicted" in fields:
+        item["predicted"] = float(d.get("predicted", 0))
+    if "created_at" in fields:
+        item["created_at"] = d.get("created_at")
+    if "input" in fields:
+        item["input"] = d.get("input", {})
+    return item
+
+
 @carbon_bp.get("/history")
 def carbon_history():
-    """Return saved prediction history for the authenticated user."""
+    """Return saved prediction history for the authenticated user.
+
+    Without ``limit``/``before``/``after`` the full history is returned oldest first as
+    ``{"items": [...]}`` (the original contract). Any of them switches to keyset pages,
+    newest first, with nextCursor/prevCursor.
+
+    Query params:
+    - limit: page size (max 500; 100 when paging with a cursor alone)
+    - before / after: cursors from a previous page's nextCursor / prevCursor
+    - fields: comma-separated subset of id,predicted,created_at,input
+    - format=ndjson: stream the full history (or ``limit`` rows) one JSON document per line
+    """
     cols = get_collections()
     if cols is None:
         return error_response("Database not configured", 503)
@@ -231,16 +306,82 @@ def carbon_history():
         return error_response("Invalid or expired token", 401)
 
     try:
-        cur = cols["carbon_footprint"].find({"userId": ObjectId(payload_token["sub"])})
-        items = []
-        for d in cur:
-            items.append({
-                "id": str(d.get("_id")),
-                "predicted": float(d.get("predicted", 0)),
-                "created_at": d.get("created_at").isoformat() if d.get("created_at") else None,
-                "input": d.get("input", {}),
-            })
-        return json_response({"items": items})
+        fields = _requested_fields(HISTORY_FIELDS)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    projection = {f: 1 for f in fields if f != "id"}
+    projection["created_at"] = 1  # needed for cursors
+
+    stream = request.args.get("format") == "ndjson"
+    paged = any(k in request.args for k in ("limit", "before", "after"))
+    try:
+        limit = request.args.get("limit", type=int)
+        if limit is None and paged and not stream:
+            limit = HISTORY_DEFAULT_LIMIT
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+        if limit is not None:
+            limit = min(limit, HISTORY_MAX_LIMIT)
+        before = request.args.get("before")
+        after = request.args.get("after")
+        if before and after:
+            raise ValueError("Use either before or after, not both")
+        query: dict = {"userId": ObjectId(payload_token["sub"])}
+        direction = -1
+        if before:
+            query.update(_keyset_filter(*_decode_cursor(before), "$lt"))
+        elif after:
+            query.update(_keyset_filter(*_decode_cursor(after), "$gt"))
+            direction = 1  # walk forward from the cursor, then flip to newest-first
+        elif not paged and not stream:
+            direction = 1  # full history, oldest first
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    # The rollup's count/lastAt move with every saved prediction, so they version the history
+    # (a missing rollup is rebuilt here; None means the user has no predictions yet).
+    version = get_rollup(cols, query["userId"]) or {}
+    etag = make_etag("history", payload_token["sub"], version.get("count", 0), version.get("lastAt"), request.query_string)
+    cached = not_modified(etag, "carbon.history")
+    if cached is not None:
+        return cached
+
+    cur = cols["carbon_footprint"].find(query, projection).sort([("created_at", direction), ("_id", direction)])
+
+    if stream:
+        if limit is not None:
+            cur = cur.limit(limit)
+
+        encoder = current_app.json
+
+        def generate():
+            for d in cur.batch_size(500):
+                yield encoder.dumps_bytes(_history_item(d, fields)) + b"\n"
+
+        return conditional(Response(stream_with_context(generate()), mimetype="application/x-ndjson"), "carbon.history", etag)
+
+    if not paged:
+        try:
+            return conditional(json_response({"items": [_history_item(d, fields) for d in cur]}), "carbon.history", etag)
+        except Exception as e:
+            current_app.logger.exception("History fetch failed: %s", e)
+            return error_response(f"History fetch failed: {e}", 500)
+
+    try:
+        # Fetch one extra row to know whether another page exists
+        docs = list(cur.limit(limit + 1))
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        if direction == 1:
+            docs.reverse()
+        items = [_history_item(d, fields) for d in docs]
+        older = has_more if direction == -1 else bool(after)
+        newer = bool(before) if direction == -1 else has_more
+        return conditional(json_response({
+            "items": items,
+            "nextCursor": _encode_cursor(docs[-1]) if docs and older else None,
+            "prevCursor": _encode_cursor(docs[0]) if docs and newer else None,
+        }), "carbon.history", etag)
     except Exception as e:
         current_app.logger.exception("History fetch failed: %s", e)
         return error_response(f"History fetch failed: {e}", 500)
@@ -256,6 +397,13 @@ def carbon_impact():
     - temperatureAnomalyC: +/- °C equivalent indicator
     - waterStressPct: 0-100 index
     Also returns trend information and a compact time series for charts.
+
+    Latest, indices and trend come from the user's rollup document. ``series`` selects
+    the chart data: full (default; every prediction, as the dashboard chart and table
+    expect), recent (last CARBON_ROLLUP_WINDOW predictions, no history scan), daily,
+    weekly or none. ``fields`` (comma-separated subset of
+    latest,indices,trend,history,baselineMonthlyKg,summary) trims the response; leaving out
+    history also skips building the series.
     """
     cols = get_collections()
     if cols is None:
@@ -269,40 +417,53 @@ def carbon_impact():
     if not payload_token or not payload_token.get("sub"):
         return error_response("Invalid or expired token", 401)
 
+    series_mode = request.args.get("series", "full")
+    if series_mode not in ("recent", "daily", "weekly", "full", "none"):
+        return error_response("series must be one of recent, daily, weekly, full, none", 400)
+    try:
+        fields = _requested_fields(IMPACT_FIELDS)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    if "history" not in fields:
+        series_mode = "none"
+
     user_id = ObjectId(payload_token["sub"])
-    cursor = cols["carbon_footprint"].find({"userId": user_id}).sort("created_at", 1)
-    history = list(cursor)
+    rollup = get_rollup(cols, user_id)
+
+    if not rollup or not rollup.get("last"):
+        empty = {"history": [], "latest": None, "indices": None, "trend": None}
+        return conditional(json_response({k: v for k, v in empty.items() if k in fields}), "carbon.impact")
 
-    if not history:
-        return json_response({
-            "history": [],
-            "latest": None,
-            "indices": None,
-            "trend": None,
-        })
+    etag = make_etag("impact", payload_token["sub"], rollup.get("count"), rollup.get("lastAt"), series_mode, fields)
+    cached = not_modified(etag, "carbon.impact")
+    if cached is not None:
+        return cached
 
     def clamp(x: float, lo: float, hi: float) -> float:
         return max(lo, min(hi, x))
 
-    def to_ts(d):
-        try:
-            return d.isoformat()
-        except Exception:
-            return None
-
-    series = [
-        {"t": to_ts(d.get("created_at")), "kg": float(d.get("predicted", 0))}
-        for d in history
-        if d.get("predicted") is not None
-    ]
-    latest = series[-1]
+    # Timestamps stay datetimes; the app's JSON provider writes them as ISO 8601.
+    recent = [{"t": p.get("t"), "kg": float(p.get("kg", 0))} for p in rollup["last"]]
+    latest = recent[-1]
+
+    if series_mode == "recent":
+        series = recent
+    elif series_mode in ("daily", "weekly"):
+        series = bucket_series(rollup, series_mode)
+    elif series_mode == "full":
+        cursor = cols["carbon_footprint"].find(
+            {"userId": user_id, "predicted": {"$ne": None}}, {"predicted": 1, "created_at": 1, "_id": 0}
+        ).sort("created_at", 1)
+        series = [{"t": d.get("created_at"), "kg": float(d.get("predicted", 0))} for d in cursor]
+    else:
+        series = []
 
     # Baseline: global average per person annual ~4000 kg => monthly ~333.3 kg
     baseline_monthly = 4000.0 / 12.0
     latest_monthly = float(latest["kg"]) if isfinite(latest["kg"]) else baseline_monthly
 
     # Smoothing: blend latest with mean of previous up to 3 to avoid jitter
-    prev = series[:-1]
+    prev = recent[:-1]
     prev_avg = None
     if prev:
         window = prev[-3:] if len(prev) >= 3 else prev
@@ -330,7 +491,7 @@ def carbon_impact():
             "prevAvgKg": round(prev_avg, 2),
         }
 
-    return json_response({
+    out = {
         "latest": {"kg": round(monthly, 2), "annualTons": round(monthly * 12.0 / 1000.0, 3), "ts": latest["t"]},
         "indices": {
             "aqi": round(aqi_index),
@@ -341,50 +502,239 @@ def carbon_impact():
         "trend": trend,
         "history": series,
         "baselineMonthlyKg": round(baseline_monthly, 2),
-    })
+        "summary": {
+            "count": int(rollup.get("count", 0)),
+            "meanMonthlyKg": round(float(rollup.get("sum", 0.0)) / rollup["count"], 2) if rollup.get("count") else None,
+            "lastAt": rollup.get("lastAt"),
+        },
+    }
+    return conditional(json_response({k: v for k, v in out.items() if k in fields}), "carbon.impact", etag)
+
+
+SERIES_BUCKETS = ("day", "week", "month")
+
+
+@carbon_bp.get("/series")
+def carbon_series():
+    """Return the user's footprint aggregated into time buckets for charts.
+
+    Query params: bucket=day|week|month (default day), optional from/to ISO dates and
+    maxPoints to downsample the buckets with LTTB.
+    Response: { bucket, points: [ { t, avg, min, max, count } ], totalBuckets }
+    """
+    cols = get_collections()
+    if cols is None:
+        return error_response("Database not configured", 503)
+
+    auth = request.headers.get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        return error_response("Missing bearer token", 401)
+    payload_token = decode_token(auth.split(" ", 1)[1])
+    if not payload_token or not payload_token.get("sub"):
+        return error_response("Invalid or expired token", 401)
+
+    bucket = request.args.get("bucket", "day")
+    if bucket not in SERIES_BUCKETS:
+        return error_response("bucket must be one of day, week, month", 400)
+    max_points = request.args.get("maxPoints", type=int)
+    if max_points is not None and max_points < 3:
+        return error_response("maxPoints must be at least 3", 400)
+
+    match: dict = {"userId": ObjectId(payload_token["sub"]), "predicted": {"$ne": None}}
+    try:
+        created: dict = {}
+        if request.args.get("from"):
+            created["$gte"] = datetime.fromisoformat(request.args["from"])
+        if request.args.get("to"):
+            created["$lt"] = datetime.fromisoformat(request.args["to"])
+        if created:
+            match["created_at"] = created
+    except ValueError:
+        return error_response("from/to must be ISO dates", 400)
+
+    trunc: dict = {"date": "$created_at", "unit": bucket}
+    if bucket == "week":
+        trunc["startOfWeek"] = "monday"
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"$dateTrunc": trunc},
+            "avg": {"$avg": "$predicted"},
+            "min": {"$min": "$predicted"},
+            "max": {"$max": "$predicted"},
+            "count": {"$count": {}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    try:
+        rows = list(cols["carbon_footprint"].aggregate(pipeline))
+    except Exception as e:
+        current_app.logger.exception("Series aggregation failed: %s", e)
+        return error_response(f"Series aggregation failed: {e}", 500)
+
+    points = [
+        {
+            "t": r["_id"].isoformat() if r.get("_id") else None,
+            "avg": round(float(r["avg"]), 2),
+            "min": round(float(r["min"]), 2),
+            "max": round(float(r["max"]), 2),
+            "count": int(r["count"]),
+            "_x": r["_id"].timestamp() if r.get("_id") else 0.0,
+        }
+        for r in rows
+    ]
+    total = len(points)
+    if max_points is not None:
+        points = lttb(points, max_points, x=lambda p: p["_x"], y=lambda p: p["avg"])
+    for p in points:
+        p.pop("_x", None)
+
+    return json_response({"bucket": bucket, "points": points, "totalBuckets": total})
 
 
 @carbon_bp.post("/calculate")
 def calculate_carbon():
     payload = request.get_json(silent=True) or {}
 
-    travel = payload.get("travel", {})
-    home = payload.get("home", {})
-    lifestyle = payload.get("lifestyle", {})
+    try:
+        return json_response(calculate_footprint(payload))
+    except Exception as e:
+        return error_response(f"Calculation failed: {e}", 400)
+
+
+# Upper bound on households per /calculate/batch request
+CALCULATE_BATCH_MAX = int(os.getenv("CARBON_CALCULATE_BATCH_MAX", "50000"))
+
+
+@carbon_bp.post("/calculate/batch")
+def calculate_carbon_batch():
+    """POST /api/carbon/calculate/batch: rule-based footprint for many households.
+
+    Body: { households: [{travel, home, lifestyle}, ...] }
+    Response: { count, results: [...] } with each result shaped exactly like /calculate.
+    """
+    payload = request.get_json(silent=True) or {}
+    households = payload.get("households")
+    if not isinstance(households, list):
+        return error_response("households must be a list", 400)
+    if len(households) > CALCULATE_BATCH_MAX:
+        return error_response(f"At most {CALCULATE_BATCH_MAX} households per request", 413)
 
     try:
-        travel_em = calculate_travel_emissions(travel)
-        home_em = calculate_home_emissions(home)
-        life_em = calculate_lifestyle_emissions(lifestyle)
-        total = travel_em + home_em + life_em
-        annual_total = total * 12
-
-        global_avg = 4000.0
-        vs_avg = ((annual_total - global_avg) / global_avg) * 100
-
-        if annual_total < 2500:
-            rating = "excellent"
-        elif annual_total < 3500:
-            rating = "good"
-        elif annual_total < 4500:
-            rating = "average"
-        elif annual_total < 6000:
-            rating = "high"
-        else:
-            rating = "very-high"
-
-        return json_response({
-            "total": round(total, 2),
-            "breakdown": {
-                "travel": travel_em,
-                "home": home_em,
-                "lifestyle": life_em,
-            },
-            "annualTotal": round(annual_total, 2),
-            "comparison": {
-                "vsAverage": round(vs_avg, 1),
-                "rating": rating,
-            },
-        })
+        results = calculate_footprints_batch(households)
     except Exception as e:
         return error_response(f"Calculation failed: {e}", 400)
+    return json_response({"count": len(results), "results": results})
+
+
+# Upper bound on evaluated scenarios (after combination) per /scenarios request
+SCENARIOS_MAX = int(os.getenv("CARBON_SCENARIOS_MAX", "5000"))
+
+
+def _predict_batch(payloads: list) -> list:
+    """Model predictions for many flat payloads in one call (the /predict aligned-features path).
+
+    Raises RuntimeError if the model is unavailable or does not expose its feature names.
+    """
+    import pandas as pd
+    artifacts = get_all()
+    model = artifacts.get("model")
+    if model is None or not hasattr(model, "predict"):
+        raise RuntimeError("Model not available")
+    expected = get_expected_feature_names_for_model(model)
+    if not expected:
+        raise RuntimeError("Model does not expose feature names; batch prediction unsupported")
+    with span("model.align"):
+        X_df = align_payloads_to_expected(payloads, expected)
+        enc = artifacts.get("encoder")
+        if enc is not None:
+            X_df = apply_label_encoders(X_df, enc)
+        scaler = artifacts.get("scaler")
+        if scaler is not None and hasattr(scaler, "transform"):
+            X_df = pd.DataFrame(scaler.transform(X_df), columns=X_df.columns)
+    with span("model.predict"):
+        preds = model.predict(X_df)
+    return [float(v) for v in preds]
+
+
+def _parse_changes(raw) -> list:
+    if not isinstance(raw, list):
+        raise ValueError("changes must be a list")
+    if len(raw) > SCENARIOS_MAX:
+        raise ValueError(f"At most {SCENARIOS_MAX} changes per request")
+    changes = []
+    for i, item in enumerate(raw):
+        values = item.get("set") if isinstance(item, dict) else None
+        if not isinstance(values, dict) or not values:
+            raise ValueError(f"changes[{i}] needs a non-empty 'set' object")
+        for path in values:
+            if path.partition(".")[0] not in SCENARIO_SECTIONS:
+                raise ValueError(f"changes[{i}]: unknown path {path}")
+        change_id = item.get("id") or ", ".join(f"{k}={v}" for k, v in values.items())
+        changes.append({"id": str(change_id), "set": values})
+    return changes
+
+
+@carbon_bp.post("/scenarios")
+def carbon_scenarios():
+    """POST /api/carbon/scenarios: rank what-if changes by how much they lower the footprint.
+
+    Body:
+    - baseline: {travel, home, lifestyle} as for /calculate (required)
+    - changes: [{id?, set: {"lifestyle.diet": "vegan", ...}}]; defaults to every known
+      single-field alternative for the baseline
+    - combine: also evaluate combinations of up to this many changes on distinct fields (1-3, default 1)
+    - model: true to add batch ML predictions per scenario
+    - rankBy: "calculator" (default) or "model"
+    - includeIncreases: keep scenarios that do not lower the footprint (default false)
+    - limit: return only the top N
+    Response: { baseline, scenarios: [...ranked], evaluated, model? }
+    """
+    payload = request.get_json(silent=True) or {}
+    baseline = payload.get("baseline")
+    if not isinstance(baseline, dict):
+        return error_response("baseline must be an object with travel/home/lifestyle", 400)
+
+    rank_by = payload.get("rankBy", "calculator")
+    use_model = bool(payload.get("model")) or rank_by == "model"
+    if rank_by not in ("calculator", "model"):
+        return error_response("rankBy must be 'calculator' or 'model'", 400)
+    try:
+        combine = int(payload.get("combine", 1))
+        if not 1 <= combine <= 3:
+            raise ValueError("combine must be between 1 and 3")
+        limit = payload.get("limit")
+        limit = int(limit) if limit is not None else None
+        changes = _parse_changes(payload["changes"]) if "changes" in payload else default_changes(baseline)
+        result = evaluate_scenarios(baseline, changes, combine=combine, max_scenarios=SCENARIOS_MAX)
+    except Exception as e:
+        return error_response(f"Scenario evaluation failed: {e}", 400)
+
+    base, scenarios = result["baseline"], result["scenarios"]
+    model_info = None
+    if use_model:
+        flat = [{**h["travel"], **h["home"], **h["lifestyle"]} for h in result["households"]]
+        try:
+            preds = _predict_batch(flat)
+            base = dict(base, predicted=preds[0])
+            for sc, pred in zip(scenarios, preds[1:]):
+                sc["predicted"] = pred
+                sc["predictedSavingsKg"] = round(preds[0] - pred, 2)
+            model_info = {"available": True}
+        except Exception as e:
+            current_app.logger.info("Scenario batch prediction unavailable: %s", e)
+            model_info = {"available": False, "reason": str(e)}
+            if rank_by == "model":
+                return error_response(f"Model ranking unavailable: {e}", 503)
+
+    key = "predictedSavingsKg" if rank_by == "model" else "savingsKg"
+    if not payload.get("includeIncreases"):
+        scenarios = [sc for sc in scenarios if sc[key] > 0]
+    scenarios.sort(key=lambda sc: sc[key], reverse=True)
+    if limit is not None:
+        scenarios = scenarios[: max(0, limit)]
+
+    out = {"baseline": base, "scenarios": scenarios, "evaluated": len(result["households"]) - 1, "rankBy": rank_by}
+    if model_info is not None:
+        out["model"] = model_info
+    return json_response(out)
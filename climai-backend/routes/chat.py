@@ -1,14 +1,20 @@
 import os
 import re
+import time
 import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from flask import Blueprint, request
+from flask import Blueprint, request, current_app
 from bson.objectid import ObjectId
 from utils.helpers import json_response, error_response
-from utils.auth import decode_token
 from utils.db import get_collections
+from utils.user_context import UserContext, current_user
+from utils.chat_sessions import get_store
+from utils.rate_limit import gate_from_env
+from utils.metrics import span
 from routes.region import (
-    _get_user_city,
     _geocode_city,
     _fetch_air_pollution,
     _fetch_weather,
@@ -17,6 +23,19 @@ from routes.region import (
 )
 
 chat_bp = Blueprint("chat", __name__)
+logger = logging.getLogger(__name__)
+
+# Overall budget for a single /ask call. Whatever is usable when it expires is returned.
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "8"))
+
+# Pipeline tasks (Gemini call, speculative rule-based answer) and upstream fetches run on
+# separate pools so a task waiting on its fetches can never starve them of workers.
+_task_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CHAT_TASK_WORKERS", "16")), thread_name_prefix="chat-task"
+)
+_io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CHAT_IO_WORKERS", "24")), thread_name_prefix="chat-io"
+)
 
 # Expanded structured knowledge base.
 TOPICS = [
@@ -347,17 +366,67 @@ def match_answer(message: str) -> str:
                 return topic["answer"]
     return GENERIC_FALLBACK
 
-def _collect_context_metrics() -> dict:
-    city = _get_user_city()
+def _remaining(deadline: float | None) -> float | None:
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def _result_within(future, deadline: float | None, default=None):
+    """Return the future's result if it completes before the deadline, else default."""
+    try:
+        return future.result(timeout=_remaining(deadline))
+    except FutureTimeoutError:
+        return default
+    except Exception:
+        logger.exception("Chat pipeline task failed")
+        return default
+
+
+def _fetch_region_aqi(city: str, api_key: str):
+    lat, lon = _geocode_city(city + ", Pakistan", api_key)
+    if lat is not None and lon is not None:
+        return _fetch_air_pollution(lat, lon, api_key)
+    return None
+
+
+def _latest_user_monthly(user_id: ObjectId) -> float | None:
+    cols = get_collections()
+    if not cols:
+        return None
+    cur = (
+        cols["carbon_footprint"]
+        .find({"userId": user_id}, {"predicted": 1, "_id": 0})
+        .sort("created_at", -1)
+        .limit(1)
+    )
+    docs = list(cur)
+    if docs:
+        return float(docs[0].get("predicted", BASELINE_MONTHLY))
+    return None
+
+
+def _collect_context_metrics(user: UserContext | None = None, deadline: float | None = None) -> dict:
+    """Gather local indicators and the user's latest footprint.
+
+    Upstream sources are fetched concurrently; any source that has not answered by
+    ``deadline`` (a ``time.monotonic()`` value) is replaced by its fallback value.
+    """
+    if user is None:
+        user = current_user()
+    city = user.city or "Lahore"
     api_key = os.getenv("OPENWEATHER_API_KEY")
 
-    temp = humidity = None
-    aqi_region = None
+    futures = {}
     if api_key:
-        lat, lon = _geocode_city(city + ", Pakistan", api_key)
-        if lat is not None and lon is not None:
-            aqi_region = _fetch_air_pollution(lat, lon, api_key)
-        temp, humidity = _fetch_weather(city, api_key)
+        futures["aqi"] = _io_executor.submit(_fetch_region_aqi, city, api_key)
+        futures["weather"] = _io_executor.submit(_fetch_weather, city, api_key)
+    if user.object_id is not None and get_collections():
+        futures["footprint"] = _io_executor.submit(_latest_user_monthly, user.object_id)
+
+    aqi_region = _result_within(futures["aqi"], deadline) if "aqi" in futures else None
+    temp, humidity = _result_within(futures["weather"], deadline, (None, None)) if "weather" in futures else (None, None)
+    user_monthly = _result_within(futures["footprint"], deadline) if "footprint" in futures else None
 
     if aqi_region is None:
         aqi_region = 140
@@ -370,22 +439,6 @@ def _collect_context_metrics() -> dict:
     water_stress = _mock_water_stress(humidity)
     temp_anomaly = round(temp - 15.0, 2)
 
-    user_monthly = None
-    auth = request.headers.get("Authorization", "")
-    cols = get_collections()
-    if cols and auth.startswith("Bearer "):
-        payload = decode_token(auth.split(" ", 1)[1])
-        if payload and payload.get("sub"):
-            cur = (
-                cols["carbon_footprint"]
-                .find({"userId": ObjectId(payload["sub"]) })
-                .sort("created_at", -1)
-                .limit(1)
-            )
-            docs = list(cur)
-            if docs:
-                user_monthly = float(docs[0].get("predicted", BASELINE_MONTHLY))
-
     ratio = (user_monthly if user_monthly is not None else BASELINE_MONTHLY) / BASELINE_MONTHLY
 
     return {
@@ -403,6 +456,37 @@ def _collect_context_metrics() -> dict:
     }
 
 
+class _MetricsLoader:
+    """Collects context metrics at most once per request, shared by the Gemini and rule-based tasks.
+
+    The first caller performs the collection on its own thread; later callers wait for it
+    until the request deadline and get None if it has not finished by then.
+    """
+
+    def __init__(self, user: UserContext, deadline: float | None):
+        self._user = user
+        self._deadline = deadline
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._started = False
+        self._value: dict | None = None
+
+    def get(self) -> dict | None:
+        with self._lock:
+            owner = not self._started
+            self._started = True
+        if owner:
+            try:
+                self._value = _collect_context_metrics(self._user, self._deadline)
+            except Exception:
+                logger.exception("Context metrics collection failed")
+            finally:
+                self._done.set()
+        else:
+            self._done.wait(_remaining(self._deadline))
+        return self._value
+
+
 def _classify_aqi(aqi: float) -> str:
     if aqi >= 301:
         return "hazardous"
@@ -522,85 +606,242 @@ def _answer_reduction(topic: str):
     return REDUCTION_MESSAGES[topic], REDUCTION_GUIDE[topic][:3]
 
 
-def _format_history_for_prompt(history: list[dict]) -> str:
-    if not history:
-        return "(no prior conversation)"
-    lines = []
-    for item in history[-10:]:
-        role = "User" if item["role"] == "user" else "Assistant"
-        lines.append(f"{role}: {item['text']}")
-    return "\n".join(lines)
+# Character budget for the Gemini prompt body (roughly 4 characters per token).
+GEMINI_PROMPT_CHAR_BUDGET = int(os.getenv("GEMINI_PROMPT_CHAR_BUDGET", "2400"))
+# Most recent turns are kept verbatim; older ones are cut to their first sentence.
+PROMPT_VERBATIM_TURNS = 4
+PROMPT_SUMMARY_CHARS = 120
+
+PROMPT_INSTRUCTIONS = (
+    "If the user asks for more detail or simpler wording, build on the previous assistant reply. "
+    "Only mention AQI/temperature/water stress/forest/footprint numbers when the user explicitly asks or it clearly improves the answer."
+)
+
 
+def _summarize_turn(text: str) -> str:
+    first = re.split(r"(?<=[.!?])\s+", text.strip(), maxsplit=1)[0]
+    if len(first) > PROMPT_SUMMARY_CHARS:
+        first = first[: PROMPT_SUMMARY_CHARS - 3].rstrip() + "..."
+    return first
 
-def _metrics_to_prompt(metrics: dict | None) -> str:
+
+def _format_history_for_prompt(history: list[dict], budget: int | None = None) -> tuple[str, int]:
+    """Render history newest-first into at most ``budget`` characters.
+
+    Returns (block, turns_included). Turns that do not fit are dropped and counted in a note.
+    """
+    if not history:
+        return "(no prior conversation)", 0
+    lines: list[str] = []
+    used = 0
+    recent = history[-10:]
+    for age, item in enumerate(reversed(recent)):
+        role = "User" if item["role"] == "user" else "Assistant"
+        text = item["text"] if age < PROMPT_VERBATIM_TURNS else _summarize_turn(item["text"])
+        line = f"{role}: {text}"
+        if budget is not None and used + len(line) + 1 > budget:
+            if age < PROMPT_VERBATIM_TURNS and not lines:
+                # Always keep a trimmed copy of the latest turn so follow-ups have context.
+                lines.append(line[: max(0, budget - 1)])
+            break
+        lines.append(line)
+        used += len(line) + 1
+    omitted = len(history) - len(lines)
+    if omitted > 0:
+        lines.append(f"({omitted} earlier turns omitted)")
+    return "\n".join(reversed(lines)), len(lines) - (1 if omitted > 0 else 0)
+
+
+def _metrics_to_prompt(metrics: dict | None, topic: str | None = None) -> str:
+    """Render context metrics; with a topic, only the city and that topic's line are included."""
     if not metrics:
         return "(metrics unavailable)"
-    lines = [
-        f"City: {metrics['city']}",
-        f"AQI (0-200 scale): {metrics['aqi']}",
-        f"Temperature: {metrics['temperatureC']} °C (anomaly {metrics['temperatureAnomalyC']} °C)",
-        f"Water stress: {metrics['waterStressPct']}%",
-        f"Forest cover change: {metrics['forestCoverChangePct']}%",
-    ]
+    lines = {
+        "aqi": f"AQI (0-200 scale): {metrics['aqi']}",
+        "temperature": f"Temperature: {metrics['temperatureC']} °C (anomaly {metrics['temperatureAnomalyC']} °C)",
+        "water": f"Water stress: {metrics['waterStressPct']}%",
+        "forest": f"Forest cover change: {metrics['forestCoverChangePct']}%",
+    }
     if metrics.get("userMonthlyKg") is not None:
-        lines.append(
+        lines["footprint"] = (
             f"User monthly footprint: {metrics['userMonthlyKg']} kg CO₂ (baseline {metrics['baselineMonthlyKg']} kg, ratio {metrics['userRatio']})"
         )
-    return "\n".join(lines)
+    if topic in lines:
+        selected = [lines[topic]]
+    else:
+        selected = list(lines.values())
+    return "\n".join([f"City: {metrics['city']}"] + selected)
+
+
+def _prompt_topic(message: str, history: list[dict]) -> str | None:
+    topic = _infer_topic_from_text(message)
+    if topic is None:
+        for item in reversed(history):
+            if item.get("role") == "user" and item.get("text") != message:
+                return _infer_topic_from_text(item["text"])
+    return topic
+
+
+def build_gemini_prompt(message: str, history: list[dict], metrics: dict | None, budget: int | None = None) -> tuple[str, dict]:
+    """Assemble the Gemini prompt within a character budget.
+
+    Fixed parts (latest message, instructions, topic-relevant metrics) are always included;
+    the remaining budget goes to conversation history, newest turns first.
+    Returns (prompt, stats) where stats describes the prompt size and what was trimmed.
+    """
+    budget = GEMINI_PROMPT_CHAR_BUDGET if budget is None else budget
+    topic = _prompt_topic(message, history)
+    metrics_block = _metrics_to_prompt(metrics, topic)
+    head = f"Latest user message: {message}\n\n{PROMPT_INSTRUCTIONS}\n"
+    tail = f"Context metrics (use only when relevant):\n{metrics_block}\n"
+    history_budget = max(0, budget - len(head) - len(tail) - len("Conversation so far:\n\n\n"))
+    history_block, turns = _format_history_for_prompt(history, history_budget)
+    prompt = f"Conversation so far:\n{history_block}\n\n{head}{tail}"
+    stats = {
+        "chars": len(prompt) + len(SYSTEM_INSTRUCTION),
+        "approxTokens": (len(prompt) + len(SYSTEM_INSTRUCTION)) // 4,
+        "historyTurns": turns,
+        "historyOmitted": len(history) - turns,
+        "metricsTopic": topic if metrics else None,
+    }
+    return prompt, stats
+
+
+class _PromptStats:
+    """Running totals of Gemini prompt sizes for /api/chat/stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_chars = 0
+        self.max_chars = 0
+        self.last_chars = 0
+        self.trimmed = 0
+
+    def record(self, stats: dict) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_chars += stats["chars"]
+            self.max_chars = max(self.max_chars, stats["chars"])
+            self.last_chars = stats["chars"]
+            if stats["historyOmitted"]:
+                self.trimmed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "meanChars": round(self.total_chars / self.count, 1) if self.count else 0.0,
+                "maxChars": self.max_chars,
+                "lastChars": self.last_chars,
+                "trimmedHistory": self.trimmed,
+                "budgetChars": GEMINI_PROMPT_CHAR_BUDGET,
+            }
+
+
+prompt_stats = _PromptStats()
+
+
+SYSTEM_INSTRUCTION = (
+    "You are a climate-specialist assistant. Tasks: answer climate science questions, explain sustainability topics, "
+    "reference local indicators (AQI, temperature anomaly, water stress, forest cover, user footprint) WHEN the user asks or it clearly helps, "
+    "respond warmly to greetings/thanks, and respect follow-up requests by using conversation history. "
+    "Keep answers concise (2-5 sentences), human-readable, and actionable. If a question is outside climate scope, redirect politely."
+)
+
+
+def _google_generate(model_name: str, system_instruction: str, prompt: str) -> str | None:
+    """Default Gemini backend: call google.generativeai and return the response text."""
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+    resp = model.generate_content(
+        prompt,
+        generation_config={
+            "temperature": 0.35,
+            "max_output_tokens": 640,
+            "top_p": 0.9,
+        },
+    )
+    text = getattr(resp, "text", None)
+    if not text and getattr(resp, "candidates", None):
+        for c in resp.candidates:
+            parts = getattr(getattr(c, "content", None), "parts", None)
+            if parts:
+                stitched = " ".join(str(p.text) for p in parts if hasattr(p, "text"))
+                if stitched:
+                    return stitched.strip()
+    return text.strip() if text else None
+
+
+_gemini_backend = _google_generate
+
+
+def set_gemini_backend(backend=None) -> None:
+    """Swap the callable used for Gemini generation (e.g. a stand-in for benchmarks).
+
+    ``backend(model_name, system_instruction, prompt)`` returns the answer text or None.
+    Passing None restores the google.generativeai backend.
+    """
+    global _gemini_backend
+    _gemini_backend = backend or _google_generate
+
+
+# Admission control for outbound Gemini calls (GEMINI_MAX_CONCURRENT, GEMINI_RATE_PER_SEC, ...).
+gemini_gate = gate_from_env("GEMINI")
+GEMINI_QUOTA_COOLDOWN_SECONDS = float(os.getenv("GEMINI_QUOTA_COOLDOWN_SECONDS", "30"))
+
+
+def _is_quota_error(exc: Exception) -> bool:
+    text = f"{type(exc).__name__} {exc}".lower()
+    return "resourceexhausted" in text or "429" in text or "quota" in text
 
 
 def _gemini_available() -> bool:
     return bool(os.getenv("GEMINI_API_KEY"))
 
 
-def ask_gemini(message: str, history: list[dict], metrics: dict | None) -> str | None:
-    try:
-        import google.generativeai as genai
-
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            return None
+def ask_gemini(
+    message: str,
+    history: list[dict],
+    metrics: dict | None,
+    user_key: str | None = None,
+    deadline: float | None = None,
+) -> str | None:
+    """Ask Gemini for an answer; None means the caller should use the rule-based path.
+
+    Calls over the rate limits, or that cannot get a concurrency slot before the queue-wait
+    budget (bounded by ``deadline``) runs out, are shed without contacting Gemini.
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
 
-        genai.configure(api_key=api_key)
+    if not gemini_gate.acquire(user_key, _remaining(deadline)):
+        current_app.logger.info("Gemini call shed by limiter; using rule-based answer")
+        return None
+    try:
         model_name = os.getenv("GEMINI_MODEL_NAME", os.getenv("MODEL_NAME", "gemini-2.0-flash"))
 
-        system_instruction = (
-            "You are a climate-specialist assistant. Tasks: answer climate science questions, explain sustainability topics, "
-            "reference local indicators (AQI, temperature anomaly, water stress, forest cover, user footprint) WHEN the user asks or it clearly helps, "
-            "respond warmly to greetings/thanks, and respect follow-up requests by using conversation history. "
-            "Keep answers concise (2-5 sentences), human-readable, and actionable. If a question is outside climate scope, redirect politely."
+        prompt, stats = build_gemini_prompt(message, history, metrics)
+        prompt_stats.record(stats)
+        current_app.logger.info(
+            "Gemini prompt built chars=%d approx_tokens=%d turns=%d omitted=%d topic=%s",
+            stats["chars"], stats["approxTokens"], stats["historyTurns"], stats["historyOmitted"], stats["metricsTopic"],
         )
 
-        history_block = _format_history_for_prompt(history)
-        metrics_block = _metrics_to_prompt(metrics) if metrics else "(metrics unavailable)"
-        prompt = (
-            f"Conversation so far:\n{history_block}\n\n"
-            f"Latest user message: {message}\n\n"
-            "If the user asks for more detail or simpler wording, build on the previous assistant reply. "
-            "Only mention AQI/temperature/water stress/forest/footprint numbers when the user explicitly asks or it clearly improves the answer.\n"
-            f"Context metrics (use only when relevant):\n{metrics_block}\n"
-        )
-
-        model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
-        resp = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.35,
-                "max_output_tokens": 640,
-                "top_p": 0.9,
-            },
-        )
-        text = getattr(resp, "text", None)
-        if not text and getattr(resp, "candidates", None):
-            for c in resp.candidates:
-                parts = getattr(getattr(c, "content", None), "parts", None)
-                if parts:
-                    stitched = " ".join(str(p.text) for p in parts if hasattr(p, "text"))
-                    if stitched:
-                        return stitched.strip()
-        return text.strip() if text else None
-    except Exception:
+        with span("gemini.generate"):
+            return _gemini_backend(model_name, SYSTEM_INSTRUCTION, prompt)
+    except Exception as e:
+        if _is_quota_error(e):
+            gemini_gate.cool_down(GEMINI_QUOTA_COOLDOWN_SECONDS)
+            current_app.logger.warning("Gemini quota exhausted; shedding calls for %.0fs: %s", GEMINI_QUOTA_COOLDOWN_SECONDS, e)
+        else:
+            current_app.logger.warning("Gemini call failed: %s", e)
         return None
+    finally:
+        gemini_gate.release()
 
 
 DYNAMIC_HANDLERS = [
@@ -657,6 +898,60 @@ DYNAMIC_HANDLERS = [
 ]
 
 
+def _submit_task(fn, *args):
+    """Run a pipeline task on the task pool inside the current app context."""
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            return fn(*args)
+
+    return _task_executor.submit(run)
+
+
+def _rule_based_answer(msg: str, history: list[dict], metrics: _MetricsLoader) -> dict:
+    """Answer from greetings, follow-ups, live-metric handlers and the knowledge base."""
+    lower = msg.lower()
+    last_bot_reply = _get_last_bot_message(history)
+    suggestions: list[str] = []
+    metrics_cache: dict | None = None
+    answer = None
+
+    if any(re.search(pattern, lower) for pattern in GREETING_PATTERNS):
+        answer = random.choice(CHAT_GREETING_RESPONSES)
+    elif any(re.search(pattern, lower) for pattern in SMALL_TALK_PATTERNS):
+        answer = random.choice(CHAT_SMALL_TALK_RESPONSES)
+    elif any(re.search(pattern, lower) for pattern in APPRECIATION_PATTERNS):
+        answer = random.choice(CHAT_APPRECIATION_RESPONSES)
+    elif last_bot_reply and any(re.search(pat, lower) for pat in FOLLOWUP_REPEAT_PATTERNS):
+        answer = f"Sure, here it is again: {last_bot_reply}"
+    elif last_bot_reply and any(re.search(pat, lower) for pat in FOLLOWUP_SIMPLIFY_PATTERNS):
+        answer = _simplify_text(last_bot_reply)
+    elif last_bot_reply and any(re.search(pat, lower) for pat in FOLLOWUP_DETAIL_PATTERNS):
+        answer = _detail_from_previous(last_bot_reply)
+
+    if not answer:
+        for entry in DYNAMIC_HANDLERS:
+            if any(re.search(pattern, lower) for pattern in entry["patterns"]):
+                if entry["needs_metrics"]:
+                    metrics_cache = metrics.get()
+                answer, suggestions = entry["handler"](metrics_cache)
+                break
+
+    if not answer:
+        answer = match_answer(msg)
+
+    return {"answer": answer, "suggestions": suggestions, "metrics": metrics_cache}
+
+
+def _gemini_answer(
+    msg: str, history: list[dict], metrics: _MetricsLoader | None, user_key: str | None, deadline: float
+) -> dict:
+    metrics_cache = metrics.get() if metrics is not None else None
+    answer = ask_gemini(msg, history, metrics_cache, user_key=user_key, deadline=deadline)
+    return {"answer": answer, "suggestions": [], "metrics": metrics_cache}
+
+
 @chat_bp.post("/ask")
 def ask():
     data = request.get_json(silent=True) or {}
@@ -669,60 +964,61 @@ def ask():
     history = _sanitize_history(data.get("history") or [])
     lower = msg.lower()
 
-    suggestions: list[str] = []
-    metrics_cache: dict | None = None
-    metrics_used = False
-    answer = None
-    answer_source = "custom-logic"
-
-    gemini_enabled = _gemini_available()
-    if gemini_enabled:
-        if _message_needs_metrics(lower, history):
-            metrics_cache = _collect_context_metrics()
-            metrics_used = metrics_cache is not None
-        answer = ask_gemini(msg, history, metrics_cache if metrics_used else None)
-        if answer:
-            answer_source = "gemini"
+    # Clients that send a sessionId (or no history at all) get server-side conversation state,
+    # so each turn only needs to carry the new message.
+    user = current_user()
+    owner = user.user_id
+    session_id = None
+    if "sessionId" in data or "history" not in data:
+        session_id, history = get_store().open(str(data.get("sessionId") or "") or None, owner, seed=history)
 
-    last_bot_reply = _get_last_bot_message(history)
+    deadline = time.monotonic() + CHAT_DEADLINE_SECONDS
+    metrics = _MetricsLoader(user, deadline)
+    answer_source = "custom-logic"
 
-    if not answer:
-        if any(re.search(pattern, lower) for pattern in GREETING_PATTERNS):
-            answer = random.choice(CHAT_GREETING_RESPONSES)
-        elif any(re.search(pattern, lower) for pattern in SMALL_TALK_PATTERNS):
-            answer = random.choice(CHAT_SMALL_TALK_RESPONSES)
-        elif any(re.search(pattern, lower) for pattern in APPRECIATION_PATTERNS):
-            answer = random.choice(CHAT_APPRECIATION_RESPONSES)
-        elif last_bot_reply and any(re.search(pat, lower) for pat in FOLLOWUP_REPEAT_PATTERNS):
-            answer = f"Sure, here it is again: {last_bot_reply}"
-        elif last_bot_reply and any(re.search(pat, lower) for pat in FOLLOWUP_SIMPLIFY_PATTERNS):
-            answer = _simplify_text(last_bot_reply)
-        elif last_bot_reply and any(re.search(pat, lower) for pat in FOLLOWUP_DETAIL_PATTERNS):
-            answer = _detail_from_previous(last_bot_reply)
+    if _gemini_available():
+        # Run Gemini and the rule-based path side by side; prefer Gemini if it answers in time.
+        gemini_metrics = metrics if _message_needs_metrics(lower, history) else None
+        gemini_future = _submit_task(
+            _gemini_answer, msg, history, gemini_metrics, owner or request.remote_addr, deadline
+        )
+        fallback_future = _submit_task(_rule_based_answer, msg, history, metrics)
 
-    if not answer:
-        for entry in DYNAMIC_HANDLERS:
-            if any(re.search(pattern, lower) for pattern in entry["patterns"]):
-                if entry["needs_metrics"]:
-                    if metrics_cache is None:
-                        metrics_cache = _collect_context_metrics()
-                    answer, suggestions = entry["handler"](metrics_cache)
-                    metrics_used = True
-                else:
-                    answer, suggestions = entry["handler"](metrics_cache)
-                break
+        gemini_result = _result_within(gemini_future, deadline)
+        if gemini_result and gemini_result["answer"]:
+            result = gemini_result
+            answer_source = "gemini"
+        else:
+            result = _result_within(fallback_future, deadline)
+            if result and not result["metrics"] and gemini_result:
+                result["metrics"] = gemini_result["metrics"]
+        if result is None:
+            current_app.logger.info("Chat deadline of %.1fs exceeded; answering from knowledge base", CHAT_DEADLINE_SECONDS)
+            result = {"answer": match_answer(msg), "suggestions": [], "metrics": None}
+    else:
+        result = _rule_based_answer(msg, history, metrics)
 
-    if not answer:
-        answer = match_answer(msg)
+    if session_id:
+        store = get_store()
+        store.append(session_id, "user", msg)
+        store.append(session_id, "bot", result["answer"])
 
     payload = {
         "message": msg,
-        "answer": answer,
+        "answer": result["answer"],
         "source": answer_source,
     }
-    if metrics_used and metrics_cache:
-        payload["metrics"] = metrics_cache
-    if suggestions:
-        payload["suggestions"] = suggestions
+    if session_id:
+        payload["sessionId"] = session_id
+    if result["metrics"]:
+        payload["metrics"] = result["metrics"]
+    if result["suggestions"]:
+        payload["suggestions"] = result["suggestions"]
 
     return json_response(payload)
+
+
+@chat_bp.get("/stats")
+def chat_stats():
+    """Return Gemini prompt-size and admission statistics for this process."""
+    return json_response({"prompt": prompt_stats.snapshot(), "gemini": gemini_gate.snapshot()})
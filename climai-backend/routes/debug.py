@@ -0,0 +1,35 @@
+from flask import Blueprint, Response, request
+from utils.helpers import json_response, error_response
+from utils.profiling import PROFILE_HEADER, request_profiler
+
+debug_bp = Blueprint("debug", __name__)
+
+
+@debug_bp.before_request
+def _require_admin():
+    # Unknown to anyone without the admin token, including when profiling is not configured.
+    if not request_profiler.is_admin(request.headers.get(PROFILE_HEADER)):
+        return error_response("Not found", 404)
+
+
+@debug_bp.get("/profiles")
+def list_profiles():
+    return json_response({
+        "sampleRate": request_profiler.sample_rate,
+        "profiles": request_profiler.store.list(),
+    })
+
+
+@debug_bp.get("/profiles/<profile_id>")
+def get_profile(profile_id: str):
+    entry = request_profiler.store.get(profile_id)
+    if entry is None:
+        return error_response("Profile not found", 404)
+    if request.args.get("format") == "text":
+        return Response(entry["text"], mimetype="text/plain")
+    return json_response(entry)
+
+
+@debug_bp.delete("/profiles")
+def clear_profiles():
+    return json_response({"deleted": request_profiler.store.clear()})
@@ -1,51 +1,52 @@
 import os
 import math
-import requests
 from flask import Blueprint, request
 from utils.helpers import json_response, error_response
-from utils.auth import decode_token
 from utils.db import get_collections
-from bson.objectid import ObjectId
+from utils.user_context import current_user
+from utils import openweather
+from utils.http_cache import conditional, make_etag, not_modified
 
 region_bp = Blueprint("region", __name__)
 
+# Major cities snapshot for /critical
+CRITICAL_CITIES = [
+    "Karachi", "Lahore", "Islamabad", "Peshawar", "Quetta",
+    "Multan", "Faisalabad", "Rawalpindi", "Sialkot", "Hyderabad"
+]
+
+
+def _snapshot_version(api_key, cities_for_air, cities_for_weather):
+    """Version of the cached OpenWeather data a response is built from (None if not all cached)."""
+    if not api_key:
+        return "no-api-key"
+    keys = []
+    for city in cities_for_air:
+        air_keys = openweather.air_quality_keys(city, api_key)
+        if air_keys is None:
+            return None
+        keys.extend(air_keys)
+    for city in cities_for_weather:
+        keys.extend(openweather.weather_keys(city, api_key))
+    return openweather.snapshot_cache.version(keys)
+
 
 def _get_user_city() -> str:
-    auth = request.headers.get("Authorization", "")
-    if auth.startswith("Bearer "):
-        token = auth.split(" ", 1)[1]
-        payload = decode_token(token)
-        cols = get_collections()
-        if payload and cols and payload.get("sub"):
-            u = cols["users"].find_one({"_id": ObjectId(payload["sub"])})
-            if u and u.get("city"):
-                return u.get("city").strip()
-    return "Lahore"  # fallback
+    return current_user().city or "Lahore"  # fallback
 
 
 def _geocode_city(city: str, api_key: str):
     try:
-        resp = requests.get(
-            "http://api.openweathermap.org/geo/1.0/direct",
-            params={"q": city, "limit": 1, "appid": api_key},
-            timeout=10,
-        )
+        resp = openweather.get(openweather.GEOCODE_URL, openweather.geocode_params(city, api_key))
         resp.raise_for_status()
-        data = resp.json()
-        if isinstance(data, list) and data:
-            return data[0].get("lat"), data[0].get("lon")
+        return openweather.parse_geocode(resp.json())
     except Exception:
         return None, None
-    return None, None
 
 
 def _fetch_air_pollution(lat: float, lon: float, api_key: str):
     try:
-        resp = requests.get(
-            "http://api.openweathermap.org/data/2.5/air_pollution",
-            params={"lat": lat, "lon": lon, "appid": api_key},
-            timeout=10,
-        )
+        resp = openweather.get(openweather.AIR_POLLUTION_URL, openweather.air_pollution_params(lat, lon, api_key))
         resp.raise_for_status()
         data = resp.json()
         aqi = data.get("list", [{}])[0].get("main", {}).get("aqi")  # 1-5 scale
@@ -60,11 +61,7 @@ def _fetch_air_pollution(lat: float, lon: float, api_key: str):
 
 def _fetch_weather(city: str, api_key: str):
     try:
-        resp = requests.get(
-            "https://api.openweathermap.org/data/2.5/weather",
-            params={"q": city, "appid": api_key, "units": "metric"},
-            timeout=10,
-        )
+        resp = openweather.get(openweather.WEATHER_URL, openweather.weather_params(city, api_key))
         resp.raise_for_status()
         data = resp.json()
         temp = data.get("main", {}).get("temp")
@@ -104,6 +101,29 @@ def regional_climate():
     if not city:
         return error_response("City not resolved", 400)
 
+    # User latest monthly kg
+    user_monthly = None
+    cols = get_collections()
+    user_oid = current_user().object_id
+    if cols is not None and user_oid is not None:
+        cur = (
+            cols["carbon_footprint"]
+            .find({"userId": user_oid}, {"predicted": 1, "_id": 0})
+            .sort("created_at", -1)
+            .limit(1)
+        )
+        docs = list(cur)
+        if docs:
+            user_monthly = float(docs[0].get("predicted", 0))
+
+    def climate_etag():
+        version = _snapshot_version(api_key, [city], [city])
+        return make_etag("climate", city, version, user_monthly) if version else None
+
+    cached = not_modified(climate_etag(), "region.climate")
+    if cached is not None:
+        return cached
+
     # Fetch region data (AQI, temp, humidity); forest and water stress mocked/derived
     temp = humidity = None
     aqi_region = None
@@ -129,19 +149,6 @@ def regional_climate():
     # Temperature anomaly: difference from nominal 15°C baseline
     temp_anomaly = round(temp - 15.0, 2)
 
-    # User latest monthly kg
-    user_monthly = None
-    cols = get_collections()
-    if cols is not None:
-        auth = request.headers.get("Authorization", "")
-        if auth.startswith("Bearer "):
-            payload = decode_token(auth.split(" ", 1)[1])
-            if payload and payload.get("sub"):
-                cur = cols["carbon_footprint"].find({"userId": ObjectId(payload["sub"]) }).sort("created_at", -1).limit(1)
-                docs = list(cur)
-                if docs:
-                    user_monthly = float(docs[0].get("predicted", 0))
-
     # Contribution deltas (simple heuristic relationships)
     # Baseline monthly kg
     baseline_monthly = 4000.0 / 12.0
@@ -158,7 +165,7 @@ def regional_climate():
     # Water stress delta: increase if over baseline
     water_stress_delta_pct = round((ratio - 1.0) * 2.5, 2)
 
-    return json_response({
+    return conditional(json_response({
         "city": city,
         "region": {
             "aqi": aqi_region,
@@ -177,7 +184,7 @@ def regional_climate():
                 "waterStressDeltaPct": water_stress_delta_pct,
             },
         },
-    })
+    }), "region.climate", climate_etag())
 
 
 @region_bp.get("/critical")
@@ -191,14 +198,17 @@ def critical_regions_pakistan():
     }
     """
     api_key = os.getenv("OPENWEATHER_API_KEY")
-    # Major cities snapshot
-    cities = [
-        "Karachi", "Lahore", "Islamabad", "Peshawar", "Quetta",
-        "Multan", "Faisalabad", "Rawalpindi", "Sialkot", "Hyderabad"
-    ]
+
+    def critical_etag():
+        version = _snapshot_version(api_key, [c + ", Pakistan" for c in CRITICAL_CITIES], CRITICAL_CITIES)
+        return make_etag("critical", version) if version else None
+
+    cached = not_modified(critical_etag(), "region.critical")
+    if cached is not None:
+        return cached
 
     regions = []
-    for city in cities:
+    for city in CRITICAL_CITIES:
         temp = humidity = None
         aqi_val = None
         if api_key:
@@ -258,8 +268,8 @@ def critical_regions_pakistan():
         "criticalCount": sum(1 for r in regions if r["riskLevel"] == "critical"),
     }
 
-    return json_response({
+    return conditional(json_response({
         "updatedAt": request.headers.get("Date"),
         "regions": regions,
         "pakistanStats": pakistan_stats,
-    })
+    }), "region.critical", critical_etag())
@@ -2,13 +2,18 @@ import os
 from flask import Blueprint, request
 from utils.helpers import json_response, error_response
 import requests
-from utils.auth import decode_token
-from utils.db import get_collections
-from bson.objectid import ObjectId
+from utils.user_context import current_user
+from utils import openweather
+from utils.http_cache import conditional, make_etag, not_modified
 
 weather_bp = Blueprint("weather", __name__)
 
 
+def _weather_etag(endpoint: str, city: str, api_key: str):
+    version = openweather.snapshot_cache.version(openweather.weather_keys(city, api_key))
+    return make_etag(endpoint, city, version) if version else None
+
+
 @weather_bp.get("/current")
 def current_weather():
     """Return current weather for a city. Uses OpenWeather if API key is set, else returns a mock."""
@@ -25,12 +30,12 @@ def current_weather():
             "source": "mock",
         })
 
+    cached = not_modified(_weather_etag(request.endpoint, city, api_key), "weather")
+    if cached is not None:
+        return cached
+
     try:
-        resp = requests.get(
-            "https://api.openweathermap.org/data/2.5/weather",
-            params={"q": city, "appid": api_key, "units": "metric"},
-            timeout=10,
-        )
+        resp = openweather.get(openweather.WEATHER_URL, openweather.weather_params(city, api_key))
         try:
             resp.raise_for_status()
         except requests.exceptions.HTTPError as http_err:
@@ -53,7 +58,7 @@ def current_weather():
             "aqi": None,  # Not available from this endpoint; left as None
             "source": "openweather",
         }
-        return json_response(out)
+        return conditional(json_response(out), "weather", _weather_etag(request.endpoint, city, api_key))
     except Exception as e:
         return error_response(f"Weather fetch failed: {e}", 502)
 
@@ -69,17 +74,7 @@ def weather_root():
 
     # If not provided, try to infer from user via bearer token
     if not city:
-        auth = request.headers.get("Authorization", "")
-        payload = None
-        if auth.startswith("Bearer "):
-            token = auth.split(" ", 1)[1]
-            payload = decode_token(token)
-        if payload:
-            cols = get_collections()
-            if cols and payload.get("sub"):
-                user = cols["users"].find_one({"_id": ObjectId(payload["sub"])})
-                if user and user.get("city"):
-                    city = user.get("city")
+        city = current_user().city or ""
 
     if not city:
         city = "Lahore"
@@ -95,12 +90,12 @@ def weather_root():
             "source": "mock",
         })
 
+    cached = not_modified(_weather_etag(request.endpoint, city, api_key), "weather")
+    if cached is not None:
+        return cached
+
     try:
-        resp = requests.get(
-            "https://api.openweathermap.org/data/2.5/weather",
-            params={"q": city, "appid": api_key, "units": "metric"},
-            timeout=10,
-        )
+        resp = openweather.get(openweather.WEATHER_URL, openweather.weather_params(city, api_key))
         try:
             resp.raise_for_status()
         except requests.exceptions.HTTPError as http_err:
@@ -126,6 +121,6 @@ def weather_root():
             "description": description,
             "source": "openweather",
         }
-        return json_response(out)
+        return conditional(json_response(out), "weather", _weather_etag(request.endpoint, city, api_key))
     except Exception as e:
         return error_response(f"Weather fetch failed: {e}", 502)
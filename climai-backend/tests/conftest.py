@@ -0,0 +1,48 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+# No external services in tests: Mongo is swapped for mongomock per test, Gemini and
+# OpenWeather stay unconfigured. Set before create_app loads .env (which does not override).
+os.environ.update({"MONGO_URI": "", "GEMINI_API_KEY": "", "OPENWEATHER_API_KEY": "", "PREDICTION_WRITE_BEHIND": "0",
+                   "SECRET_KEY": "test-secret-key-at-least-32-bytes-long"})
+
+import mongomock  # noqa: E402
+from bson.objectid import ObjectId  # noqa: E402
+
+from app import create_app  # noqa: E402
+from utils import db  # noqa: E402
+from utils.auth import create_access_token  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def collections():
+    """A fresh in-memory database for each test."""
+    return db.use_client(mongomock.MongoClient())
+
+
+@pytest.fixture
+def user(collections):
+    """(user id, Authorization headers) for a user with no predictions yet."""
+    user_id = ObjectId()
+    token = create_access_token(str(user_id), f"{user_id}@example.com")
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def prediction_docs(user_id, kgs, start=None):
+    start = start or datetime(2025, 1, 1)
+    return [
+        {"userId": user_id, "input": {}, "predicted": float(kg), "created_at": start + timedelta(hours=i)}
+        for i, kg in enumerate(kgs)
+    ]
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+import routes.carbon as carbon
+from conftest import prediction_docs
+
+
+def save(user_id, kgs, start=None):
+    carbon._persist_predictions(prediction_docs(user_id, kgs, start))
+
+
+@pytest.mark.parametrize("path", ["/api/carbon/history", "/api/carbon/history?limit=2", "/api/carbon/impact?series=recent"])
+def test_revalidation_until_a_new_prediction(client, user, path):
+    user_id, headers = user
+    save(user_id, [300, 320, 310])
+
+    first = client.get(path, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    cached = client.get(path, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+    save(user_id, [500], start=datetime(2025, 2, 1))
+    fresh = client.get(path, headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+
+
+def test_history_etag_depends_on_query(client, user):
+    user_id, headers = user
+    save(user_id, [300, 320])
+    full = client.get("/api/carbon/history", headers=headers).headers["ETag"]
+    paged = client.get("/api/carbon/history?limit=1", headers=headers).headers["ETag"]
+    assert full != paged
+
+
+def test_history_sends_etag_without_a_rollup(client, user, collections):
+    user_id, headers = user
+    assert client.get("/api/carbon/history", headers=headers).headers.get("ETag")
+
+    save(user_id, [300, 320])
+    collections["carbon_rollups"].delete_many({})
+    r = client.get("/api/carbon/history", headers=headers)
+    assert r.status_code == 200
+    assert len(r.get_json()["items"]) == 2
+    assert r.headers.get("ETag")
+    assert collections["carbon_rollups"].find_one({"_id": user_id})["count"] == 2
+
+
+def test_failed_fold_discards_the_rollup(client, user, collections, monkeypatch):
+    user_id, headers = user
+    save(user_id, [300, 320])
+    history_etag = client.get("/api/carbon/history", headers=headers).headers["ETag"]
+    impact_etag = client.get("/api/carbon/impact?series=recent", headers=headers).headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("rollup unavailable")
+
+    monkeypatch.setattr(carbon, "record_predictions", fail)
+    with pytest.raises(RuntimeError):
+        save(user_id, [900], start=datetime(2025, 3, 1))
+    assert collections["carbon_rollups"].find_one({"_id": user_id}) is None
+    monkeypatch.undo()
+
+    r = client.get("/api/carbon/history", headers={**headers, "If-None-Match": history_etag})
+    assert r.status_code == 200
+    assert len(r.get_json()["items"]) == 3
+    r = client.get("/api/carbon/impact?series=recent", headers={**headers, "If-None-Match": impact_etag})
+    assert r.status_code == 200
+    assert r.get_json()["summary"]["count"] == 3
+
+
+def test_impact_etag_varies_with_fields(client, user):
+    user_id, headers = user
+    save(user_id, [300])
+    a = client.get("/api/carbon/impact?series=recent", headers=headers).headers["ETag"]
+    b = client.get("/api/carbon/impact?series=recent&fields=latest", headers=headers).headers["ETag"]
+    assert a != b
@@ -0,0 +1,67 @@
+import time
+
+from utils import db
+from utils.chat_sessions import ConversationStore
+
+
+def test_lru_eviction_spills_and_reloads(collections):
+    store = ConversationStore(ttl_seconds=60, max_sessions=2, spill=True)
+    first, _ = store.open(None, "alice")
+    store.append(first, "user", "hello")
+    store.append(first, "bot", "hi there")
+    for owner in ("bob", "carol"):
+        sid, _ = store.open(None, owner)
+        store.append(sid, "user", "x")
+
+    assert len(store) == 2
+    spilled = collections["chat_sessions"].find_one({"_id": first})
+    assert spilled["owner"] == "alice"
+    assert [t["text"] for t in spilled["turns"]] == ["hello", "hi there"]
+    assert spilled["updated_at"] is not None
+
+    sid, history = store.open(first, "alice")
+    assert sid == first
+    assert history == [{"role": "user", "text": "hello"}, {"role": "bot", "text": "hi there"}]
+    assert collections["chat_sessions"].find_one({"_id": first}) is None
+
+
+def test_spilled_session_not_reused_by_another_owner(collections):
+    store = ConversationStore(ttl_seconds=60, max_sessions=1, spill=True)
+    sid, _ = store.open(None, "alice")
+    store.append(sid, "user", "private")
+    store.open(None, "bob")
+
+    other, history = store.open(sid, "mallory")
+    assert other != sid
+    assert history == []
+
+
+def test_append_sweeps_idle_sessions(collections):
+    store = ConversationStore(ttl_seconds=0.05, max_sessions=100, spill=True)
+    idle = [store.open(None, f"user{i}")[0] for i in range(3)]
+    active, _ = store.open(None, "active")
+    for sid in idle:
+        store.append(sid, "user", "hi")
+    time.sleep(0.1)
+
+    store.append(active, "user", "still here")
+    assert len(store) == 1
+    assert collections["chat_sessions"].count_documents({"_id": {"$in": idle}}) == 3
+
+
+def test_without_spill_evicted_sessions_are_dropped(collections):
+    store = ConversationStore(ttl_seconds=60, max_sessions=1, spill=False)
+    sid, _ = store.open(None, "alice")
+    store.append(sid, "user", "hello")
+    store.open(None, "bob")
+    assert collections["chat_sessions"].count_documents({}) == 0
+    assert store.open(sid, "alice")[0] != sid
+
+
+def test_ttl_index_follows_session_ttl(collections, monkeypatch):
+    monkeypatch.setenv("CHAT_SESSION_TTL_SECONDS", "600")
+    report = db.ensure_indexes(True)
+    assert "chat_sessions:updated_at_1" in report["created"]
+    info = collections["chat_sessions"].index_information()["updated_at_1"]
+    assert info["expireAfterSeconds"] == 600
+    assert "chat_sessions:updated_at_1" in db.ensure_indexes(True)["present"]
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from utils.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, RequestProfiler
+
+TOKEN = "profile-admin-token"
+
+
+@pytest.fixture
+def profiled_app(monkeypatch):
+    monkeypatch.setenv("PROFILE_ADMIN_TOKEN", TOKEN)
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "0")
+    app = Flask(__name__)
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.05)
+        return {"ok": True}
+
+    profiler = RequestProfiler()
+    profiler.init_app(app)
+    return app, profiler
+
+
+def test_profiles_only_with_admin_token(profiled_app):
+    app, profiler = profiled_app
+    client = app.test_client()
+    assert PROFILE_ID_HEADER not in client.get("/slow").headers
+    assert PROFILE_ID_HEADER not in client.get("/slow", headers={PROFILE_HEADER: "wrong"}).headers
+
+    r = client.get("/slow", headers={PROFILE_HEADER: TOKEN})
+    assert r.status_code == 200
+    entry = profiler.store.get(r.headers[PROFILE_ID_HEADER])
+    assert entry["endpoint"] == "slow"
+    assert entry["totalCalls"] > 0
+
+
+def test_overlapping_requests_run_unprofiled(profiled_app):
+    app, profiler = profiled_app
+    results = []
+    start = threading.Barrier(8)
+
+    def hit():
+        client = app.test_client()
+        start.wait()
+        r = client.get("/slow", headers={PROFILE_HEADER: TOKEN})
+        results.append((r.status_code, r.headers.get(PROFILE_ID_HEADER)))
+
+    threads = [threading.Thread(target=hit) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [status for status, _ in results] == [200] * 8
+    ids = [pid for _, pid in results if pid]
+    assert 1 <= len(ids) < 8
+    assert sorted(e["id"] for e in profiler.store.list()) == sorted(ids)
@@ -0,0 +1,57 @@
+import pytest
+
+import routes.carbon as carbon
+from utils.carbon_calc import _combine, evaluate_scenarios
+
+BASELINE = {"travel": {"transport": "car", "vehicleType": "petrol", "monthlyKm": 500}, "lifestyle": {"diet": "balanced"}}
+
+CHANGES = [
+    {"id": "vegan", "set": {"lifestyle.diet": "vegan"}},
+    {"id": "vegetarian", "set": {"lifestyle.diet": "vegetarian"}},
+    {"id": "half-km", "set": {"travel.monthlyKm": 250}},
+    {"id": "low-power", "set": {"home.electricityUsage": "low"}},
+]
+
+
+def test_combinations_skip_overlapping_fields():
+    grid = _combine(CHANGES, 2)
+    ids = [c["id"] for c in grid]
+    assert ids[:4] == ["vegan", "vegetarian", "half-km", "low-power"]
+    assert "vegan + vegetarian" not in ids
+    assert "vegan + half-km" in ids
+    assert len(grid) == 4 + 5
+
+
+def test_combine_stops_past_the_limit():
+    many = [{"id": str(i), "set": {f"lifestyle.f{i}": i}} for i in range(3000)]
+    assert len(_combine(many, 3, limit=10)) == 11
+    assert len(_combine(many[:5], 1, limit=10)) == 5
+
+
+def test_evaluate_within_limit():
+    result = evaluate_scenarios(BASELINE, CHANGES, combine=2, max_scenarios=9)
+    assert len(result["scenarios"]) == 9
+    assert len(result["households"]) == 10
+    by_id = {s["id"]: s for s in result["scenarios"]}
+    assert by_id["half-km"]["savingsKg"] > 0
+
+
+def test_evaluate_rejects_oversized_grid():
+    with pytest.raises(ValueError, match="More than 8 scenarios"):
+        evaluate_scenarios(BASELINE, CHANGES, combine=2, max_scenarios=8)
+
+
+def test_endpoint_caps_changes(client, monkeypatch):
+    monkeypatch.setattr(carbon, "SCENARIOS_MAX", 3)
+    r = client.post("/api/carbon/scenarios", json={"baseline": BASELINE, "changes": CHANGES})
+    assert r.status_code == 400
+    assert "At most 3 changes" in r.get_json()["error"]
+
+
+def test_endpoint_caps_combined_grid(client, monkeypatch):
+    monkeypatch.setattr(carbon, "SCENARIOS_MAX", 5)
+    body = {"baseline": BASELINE, "changes": CHANGES, "includeIncreases": True}
+    assert client.post("/api/carbon/scenarios", json=body).status_code == 200
+    r = client.post("/api/carbon/scenarios", json={**body, "combine": 2})
+    assert r.status_code == 400
+    assert "More than 5 scenarios" in r.get_json()["error"]
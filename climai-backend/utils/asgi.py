@@ -0,0 +1,191 @@
+import os
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+try:
+    import httpx
+    from asgiref.sync import ThreadSensitiveContext
+    from asgiref.wsgi import WsgiToAsgi
+except Exception:  # pragma: no cover - optional dependencies of the ASGI serving mode
+    httpx = None  # type: ignore
+    ThreadSensitiveContext = None  # type: ignore
+    WsgiToAsgi = None  # type: ignore
+
+from utils import openweather
+from utils.metrics import span
+from utils.user_context import profile_cache, user_from_auth_header
+
+logger = logging.getLogger(__name__)
+
+Prefetched = Dict[openweather.RequestKey, Any]
+
+# The current request's prefetched upstream responses. asgiref runs the WSGI app under a copy
+# of the calling task's context, so the view's thread sees the value set by the gateway.
+_prefetched: ContextVar[Optional[Prefetched]] = ContextVar("climai_openweather_prefetched", default=None)
+
+
+class _PrefetchEnviron:
+    """WSGI middleware adding the gateway's prefetched upstream responses to the environ."""
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    def __call__(self, environ, start_response):
+        prefetched = _prefetched.get()
+        if prefetched:
+            environ[openweather.PREFETCH_ENVIRON_KEY] = prefetched
+        return self.wsgi_application(environ, start_response)
+
+
+async def _fetch(client, url: str, params: Dict[str, Any], out: Prefetched) -> None:
+    key = openweather.request_key(url, params)
+    cached = openweather.snapshot_cache.get(key)
+    if cached is not None:
+        out[key] = cached[1]
+        return
+    try:
+        with span(openweather.SPAN_NAMES.get(url, "openweather")):
+            resp = await client.get(url, params=params)
+        out[key] = openweather.snapshot_cache.put(key, resp.status_code, resp.json())
+    except Exception as e:
+        out[key] = e
+
+
+async def _fetch_air_quality(client, city: str, api_key: str, out: Prefetched) -> None:
+    params = openweather.geocode_params(city, api_key)
+    await _fetch(client, openweather.GEOCODE_URL, params, out)
+    resp = out.get(openweather.request_key(openweather.GEOCODE_URL, params))
+    if isinstance(resp, openweather.UpstreamResponse) and resp.status_code < 400:
+        lat, lon = openweather.parse_geocode(resp.json())
+        if lat is not None and lon is not None:
+            await _fetch(client, openweather.AIR_POLLUTION_URL, openweather.air_pollution_params(lat, lon, api_key), out)
+
+
+def _query_arg(scope, name: str) -> Optional[str]:
+    values = parse_qs(scope.get("query_string", b"").decode("latin1"), keep_blank_values=True).get(name)
+    return values[0] if values else None
+
+
+def _user_city(scope) -> Optional[str]:
+    """The caller's city without database I/O: token claims or the profile cache.
+
+    Anonymous callers get the routes' "Lahore" default; None means unknown here, and the
+    route resolves it (and fetches) itself.
+    """
+    auth = ""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            auth = value.decode("latin1")
+            break
+    user = user_from_auth_header(auth)
+    if not user.user_id:
+        return "Lahore"
+    city = user.claims.get("city") if user.has_profile_claims else None
+    city = city or (profile_cache.get(user.user_id) or {}).get("city")
+    return city.strip() if city and city.strip() else None
+
+
+async def _prefetch_climate(client, scope, api_key: str, out: Prefetched) -> None:
+    city = (_query_arg(scope, "city") or "").strip() or _user_city(scope)
+    if city:
+        await asyncio.gather(
+            _fetch_air_quality(client, city, api_key, out),
+            _fetch(client, openweather.WEATHER_URL, openweather.weather_params(city, api_key), out),
+        )
+
+
+async def _prefetch_critical(client, scope, api_key: str, out: Prefetched) -> None:
+    from routes.region import CRITICAL_CITIES
+
+    jobs = []
+    for city in CRITICAL_CITIES:
+        jobs.append(_fetch(client, openweather.WEATHER_URL, openweather.weather_params(city, api_key), out))
+        jobs.append(_fetch_air_quality(client, city + ", Pakistan", api_key, out))
+    await asyncio.gather(*jobs)
+
+
+async def _prefetch_weather(client, scope, api_key: str, out: Prefetched) -> None:
+    city = (_query_arg(scope, "city") or "").strip() or _user_city(scope)
+    if city:
+        await _fetch(client, openweather.WEATHER_URL, openweather.weather_params(city, api_key), out)
+
+
+async def _prefetch_current_weather(client, scope, api_key: str, out: Prefetched) -> None:
+    city = _query_arg(scope, "city")
+    await _fetch(client, openweather.WEATHER_URL, openweather.weather_params("Lahore" if city is None else city, api_key), out)
+
+
+# (method, path) -> coroutine issuing every OpenWeather request the route will make
+PREFETCHERS: Dict[tuple, Callable[..., Awaitable[None]]] = {
+    ("GET", "/api/region/climate"): _prefetch_climate,
+    ("GET", "/api/region/critical"): _prefetch_critical,
+    ("GET", "/api/weather"): _prefetch_weather,
+    ("GET", "/api/weather/current"): _prefetch_current_weather,
+}
+
+
+class AsyncGateway:
+    """ASGI front for the Flask app.
+
+    For the OpenWeather-bound routes the upstream requests are issued concurrently on the
+    event loop with a shared httpx client, so no worker thread waits on the network; the Flask
+    view then runs in a worker thread, finds the responses in its environ and keeps its exact
+    JSON contract. Every other route goes straight to a worker thread.
+
+    Each request gets its own thread through asgiref's ThreadSensitiveContext (plain WsgiToAsgi
+    would run every view on one shared thread); at most ``threads`` run at once.
+    """
+
+    def __init__(self, wsgi_app, threads: Optional[int] = None, max_connections: Optional[int] = None):
+        if httpx is None or WsgiToAsgi is None:
+            raise RuntimeError("ASGI mode needs asgiref and httpx: pip install asgiref httpx uvicorn")
+        self.wsgi_app = wsgi_app
+        self.threads = threads or int(os.getenv("ASGI_WSGI_THREADS", "32"))
+        self.max_connections = max_connections or int(os.getenv("ASGI_UPSTREAM_MAX_CONNECTIONS", "100"))
+        self._bridge = WsgiToAsgi(_PrefetchEnviron(wsgi_app))
+        self._slots = asyncio.Semaphore(self.threads)
+        self._client = None
+
+    def _http(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=openweather.TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=self.max_connections),
+            )
+        return self._client
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._http()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._client is not None:
+                    await self._client.aclose()
+                    self._client = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        prefetched: Optional[Prefetched] = None
+        prefetch = PREFETCHERS.get((scope.get("method"), scope.get("path")))
+        api_key = os.getenv("OPENWEATHER_API_KEY")
+        if prefetch is not None and api_key:
+            prefetched = {}
+            try:
+                await prefetch(self._http(), scope, api_key, prefetched)
+            except Exception as e:
+                logger.warning("OpenWeather prefetch for %s failed: %s", scope.get("path"), e)
+        token = _prefetched.set(prefetched)
+        try:
+            async with self._slots, ThreadSensitiveContext():
+                await self._bridge(scope, receive, send)
+        finally:
+            _prefetched.reset(token)
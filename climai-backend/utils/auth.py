@@ -1,59 +1,212 @@
 import os
+import time
+import hashlib
+import threading
 import datetime as dt
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 
 import jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
 
 
-# Support multiple hashing schemes so we can migrate off problematic bcrypt builds.
-# New hashes will use pbkdf2_sha256; existing bcrypt hashes still verify if backend works.
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256", "bcrypt"],
-    default="pbkdf2_sha256",
-    deprecated="auto",
-)
+_secret: Optional[str] = None
+_secret_lock = threading.Lock()
 
 
-def get_secret() -> str:
+def _load_backend_env() -> None:
     # Load .env from backend directory explicitly
     backend_env = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
     load_dotenv(dotenv_path=backend_env, override=False)
+
+
+def _read_secret() -> str:
+    _load_backend_env()
     return os.getenv("SECRET_KEY", "dev-secret")
 
 
+def get_secret() -> str:
+    """The JWT signing secret, read from the environment/.env once per process."""
+    global _secret
+    if _secret is None:
+        with _secret_lock:
+            if _secret is None:
+                _secret = _read_secret()
+    return _secret
+
+
+def rotate_secret(secret: Optional[str] = None) -> None:
+    """Switch to a new signing secret (or re-read SECRET_KEY when none is given).
+
+    Tokens signed with the previous secret stop verifying immediately, including ones
+    held in the verified-token cache.
+    """
+    global _secret
+    with _secret_lock:
+        _secret = secret or _read_secret()
+    token_cache.clear()
+
+
+# Support multiple hashing schemes so we can migrate off problematic bcrypt builds.
+# New hashes will use pbkdf2_sha256; existing bcrypt hashes still verify if backend works.
+# AUTH_PBKDF2_ROUNDS raises (or lowers) the work factor; hashes made with fewer rounds are
+# reported by needs_update() and upgraded on the next successful login.
+_pwd_context: Optional[CryptContext] = None
+_pwd_context_lock = threading.Lock()
+
+
+def _build_pwd_context() -> CryptContext:
+    _load_backend_env()
+    rounds = os.getenv("AUTH_PBKDF2_ROUNDS")
+    return CryptContext(
+        schemes=["pbkdf2_sha256", "bcrypt"],
+        default="pbkdf2_sha256",
+        deprecated="auto",
+        **({"pbkdf2_sha256__default_rounds": int(rounds), "pbkdf2_sha256__min_rounds": int(rounds)} if rounds else {}),
+    )
+
+
+def get_pwd_context() -> CryptContext:
+    """The password hashing policy, built on first use (also inside hashing pool workers)."""
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                _pwd_context = _build_pwd_context()
+    return _pwd_context
+
+
+class TokenCache:
+    """Bounded LRU of verified token payloads keyed by SHA-256 of the token.
+
+    Entries are only served until the token's own ``exp``; tokens without one are never cached.
+    ``clear()`` starts a new generation: a put tagged with an earlier one (a decode that was
+    already in flight under the previous secret) is dropped.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        # None: TOKEN_CACHE_SIZE (default 4096), read on first use
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        self.generation = 0
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is None:
+            _load_backend_env()
+            self._max_entries = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+        return self._max_entries
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, token: str, payload: Dict[str, Any], generation: Optional[int] = None) -> None:
+        exp = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[self._key(token)] = (float(exp), dict(payload))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["size"] = len(self._entries)
+        return out
+
+
+token_cache = TokenCache()
+
+
 def hash_password(password: str) -> str:
     # Truncate overly long passwords for bcrypt compatibility edge cases (>72 bytes)
     if len(password) > 200:  # hard cap to avoid abuse
         password = password[:200]
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     # If bcrypt backend is broken, pbkdf2 hashes still work; bcrypt hashes may raise.
     try:
-        return pwd_context.verify(password, password_hash)
+        return get_pwd_context().verify(password, password_hash)
     except ValueError:
         # Bcrypt failure due to backend bug or length; deny auth gracefully.
         return False
 
 
-def create_access_token(user_id: str, email: str, expires_minutes: int = 60 * 24) -> str:
+def verify_password_needs_update(password: str, password_hash: str) -> Tuple[bool, bool]:
+    """Return (valid, needs_update): whether the hash should be replaced with one from the current policy."""
+    if not verify_password(password, password_hash):
+        return False, False
+    try:
+        return True, get_pwd_context().needs_update(password_hash)
+    except ValueError:
+        return True, False
+
+
+# Version of the claim set written by create_access_token. v2 tokens carry a snapshot of the
+# profile fields hot read paths need (name, city), so they can skip the users lookup.
+# Tokens without "ver" are v1 (sub/email only).
+TOKEN_CLAIMS_VERSION = 2
+PROFILE_CLAIMS = ("name", "city")
+
+
+def create_access_token(
+    user_id: str,
+    email: str,
+    expires_minutes: int = 60 * 24,
+    profile: Optional[Dict[str, Any]] = None,
+) -> str:
     payload = {
         "sub": user_id,
         "email": email,
         "exp": dt.datetime.utcnow() + dt.timedelta(minutes=expires_minutes),
         "iat": dt.datetime.utcnow(),
         "type": "access",
+        "ver": TOKEN_CLAIMS_VERSION,
     }
+    for field in PROFILE_CLAIMS:
+        if profile and profile.get(field):
+            payload[field] = profile[field]
     token = jwt.encode(payload, get_secret(), algorithm="HS256")
     return token
 
 
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    data = token_cache.get(token)
+    if data is not None:
+        return data
+    # Taken before the secret is read: if rotate_secret clears the cache meanwhile, this
+    # payload (possibly verified with the old secret) is not cached.
+    generation = token_cache.generation
     try:
         data = jwt.decode(token, get_secret(), algorithms=["HS256"])
-        return data
     except Exception:
         return None
+    token_cache.put(token, data, generation)
+    return data
@@ -0,0 +1,454 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# Emission factors (kg CO2) — aligned with the frontend calculator
+EMISSION_FACTORS = {
+    "transport": {
+        "car": {
+            "petrol": 0.192,  # per km
+            "diesel": 0.171,
+            "electric": 0.047,
+            "hybrid": 0.109,
+        },
+        "public": 0.089,  # per km
+        "bike": 0,
+        "walk": 0,
+    },
+    "flights": {
+        "never": 0,
+        "rarely": 300,  # per year
+        "sometimes": 900,
+        "frequently": 2400,
+    },
+    "electricity": {
+        "low": 150,  # monthly kg CO2
+        "medium": 300,
+        "high": 500,
+    },
+    "waste": {
+        "small": 15,  # per bag per week
+        "medium": 25,
+        "large": 40,
+    },
+    "recycling": {"multiplier": 0.7},  # 30% reduction
+    "diet": {
+        "meat-heavy": 3300,  # annual kg CO2
+        "balanced": 2500,
+        "vegetarian": 1700,
+        "vegan": 1500,
+    },
+    "water": {  # monthly kg CO2
+        "twice-daily": 50,
+        "daily": 35,
+        "every-other": 20,
+    },
+    "clothing": 22,  # per item
+    "screenTime": 0.6,  # per hour daily (monthly)
+}
+
+GLOBAL_AVERAGE_ANNUAL_KG = 4000.0
+
+# Annual kg upper bounds for each rating; anything above the last bound is "very-high".
+RATING_BOUNDS = ((2500, "excellent"), (3500, "good"), (4500, "average"), (6000, "high"))
+
+
+def calculate_travel_emissions(data: dict) -> float:
+    emissions = 0.0
+    transport = data.get("transport")
+    monthly_km = float(data.get("monthlyKm", 0) or 0)
+
+    if transport == "car":
+        vehicle = data.get("vehicleType")
+        if vehicle in EMISSION_FACTORS["transport"]["car"]:
+            emissions += monthly_km * EMISSION_FACTORS["transport"]["car"][vehicle]
+    elif transport == "public":
+        emissions += monthly_km * EMISSION_FACTORS["transport"]["public"]
+
+    flights = data.get("flightFrequency", "never")
+    emissions += EMISSION_FACTORS["flights"].get(flights, 0) / 12
+    return round(emissions, 2)
+
+
+def calculate_home_emissions(data: dict) -> float:
+    emissions = 0.0
+    electricity = data.get("electricityUsage", "medium")
+    emissions += EMISSION_FACTORS["electricity"].get(electricity, 300)
+
+    bags_per_week = float(data.get("wasteBagsPerWeek", 0) or 0)
+    bag_size = data.get("wasteBagSize", "medium")
+    waste = bags_per_week * 4.33 * EMISSION_FACTORS["waste"].get(bag_size, 25)
+    if data.get("wasteRecycling", False):
+        waste *= EMISSION_FACTORS["recycling"]["multiplier"]
+    emissions += waste
+    return round(emissions, 2)
+
+
+def calculate_lifestyle_emissions(data: dict) -> float:
+    emissions = 0.0
+    diet = data.get("diet", "balanced")
+    emissions += EMISSION_FACTORS["diet"].get(diet, 2500) / 12
+
+    shower = data.get("showerFrequency", "daily")
+    emissions += EMISSION_FACTORS["water"].get(shower, 35)
+
+    clothes = float(data.get("newClothesMonthly", 0) or 0)
+    emissions += clothes * EMISSION_FACTORS["clothing"]
+
+    screen = float(data.get("screenTimeDaily", 0) or 0)
+    emissions += screen * 30 * EMISSION_FACTORS["screenTime"]
+    return round(emissions, 2)
+
+
+def rate_annual(annual_total: float) -> str:
+    for bound, rating in RATING_BOUNDS:
+        if annual_total < bound:
+            return rating
+    return "very-high"
+
+
+def calculate_footprint(payload: dict) -> Dict[str, Any]:
+    """Rule-based monthly footprint for one household ({travel, home, lifestyle} sections)."""
+    travel_em = calculate_travel_emissions(payload.get("travel", {}))
+    home_em = calculate_home_emissions(payload.get("home", {}))
+    life_em = calculate_lifestyle_emissions(payload.get("lifestyle", {}))
+    total = travel_em + home_em + life_em
+    annual_total = total * 12
+    vs_avg = ((annual_total - GLOBAL_AVERAGE_ANNUAL_KG) / GLOBAL_AVERAGE_ANNUAL_KG) * 100
+
+    return {
+        "total": round(total, 2),
+        "breakdown": {
+            "travel": travel_em,
+            "home": home_em,
+            "lifestyle": life_em,
+        },
+        "annualTotal": round(annual_total, 2),
+        "comparison": {
+            "vsAverage": round(vs_avg, 1),
+            "rating": rate_annual(annual_total),
+        },
+    }
+
+
+# ---- Batch (vectorized) path -------------------------------------------------------------
+#
+# Categorical inputs are encoded as indexes into lookup arrays compiled from EMISSION_FACTORS;
+# the arithmetic then runs column-wise with the same operations, in the same order, as the
+# scalar functions above so every float comes out bit-for-bit identical.
+
+
+def _compile_lookup(table: Dict[str, Any], default: float):
+    """(key -> index, factors) where index len(table) holds the fallback factor."""
+    keys = list(table)
+    factors = np.array([float(table[k]) for k in keys] + [float(default)], dtype=np.float64)
+    return {k: i for i, k in enumerate(keys)}, factors
+
+
+_CAR_INDEX, _CAR_FACTORS = _compile_lookup(EMISSION_FACTORS["transport"]["car"], 0.0)
+_FLIGHT_INDEX, _FLIGHT_FACTORS = _compile_lookup(EMISSION_FACTORS["flights"], 0)
+_ELEC_INDEX, _ELEC_FACTORS = _compile_lookup(EMISSION_FACTORS["electricity"], 300)
+_WASTE_INDEX, _WASTE_FACTORS = _compile_lookup(EMISSION_FACTORS["waste"], 25)
+_DIET_INDEX, _DIET_FACTORS = _compile_lookup(EMISSION_FACTORS["diet"], 2500)
+_WATER_INDEX, _WATER_FACTORS = _compile_lookup(EMISSION_FACTORS["water"], 35)
+_FLIGHT_DEFAULT, _ELEC_DEFAULT, _WASTE_DEFAULT, _DIET_DEFAULT, _WATER_DEFAULT = (
+    len(_FLIGHT_INDEX), len(_ELEC_INDEX), len(_WASTE_INDEX), len(_DIET_INDEX), len(_WATER_INDEX)
+)
+
+# Per-km factor by mode: the car vehicle types, then public transport, then "no per-km emissions"
+_KM_PUBLIC = len(_CAR_INDEX)
+_KM_NONE = _KM_PUBLIC + 1
+_KM_FACTORS = np.concatenate([_CAR_FACTORS[:-1], [float(EMISSION_FACTORS["transport"]["public"]), 0.0]])
+
+_RATING_BOUNDS = np.array([float(b) for b, _ in RATING_BOUNDS])
+_RATING_LABELS = np.array([r for _, r in RATING_BOUNDS] + ["very-high"], dtype=object)
+
+
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Element-wise equivalent of Python's ``round(v, ndigits)``.
+
+    ``np.round`` computes ``rint(v * 10**n) / 10**n``; that matches Python's correctly rounded
+    result except when the scaled product lands exactly on a .5 tie that the exact product did
+    not. For those elements the rounding error of the product (recovered exactly with Dekker's
+    two-product) decides the direction. Non-finite and very large values use ``round`` itself.
+    """
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = values * scale
+        rounded = np.rint(scaled)
+        tie = (scaled - np.floor(scaled)) == 0.5
+        if tie.any():
+            # Exact error of values * scale (scale is a small integer, so it needs no split)
+            split = values * 134217729.0  # 2**27 + 1
+            hi = split - (split - values)
+            err = (hi * scale - scaled) + (values - hi) * scale
+            rounded = np.where(tie & (err > 0), np.ceil(scaled), rounded)
+            rounded = np.where(tie & (err < 0), np.floor(scaled), rounded)
+        out = rounded / scale
+        odd = ~np.isfinite(scaled) | (np.abs(scaled) >= 2.0 ** 52)
+    idx = np.flatnonzero(odd)
+    if idx.size:
+        out[idx] = [round(v, ndigits) for v in values[idx].tolist()]
+    return out
+
+
+class HouseholdColumns:
+    """Column-wise encoding of a list of household payloads.
+
+    Each household is reduced to one tuple of numbers in a single Python pass (the only
+    per-row work); the columns are then sliced out of one float64 matrix.
+    """
+
+    def __init__(self, households: Sequence[dict]):
+        rows = []
+        encode = self._encode
+        for i, h in enumerate(households):
+            try:
+                rows.append(encode(h))
+            except Exception as e:
+                raise ValueError(f"household {i}: {e}") from e
+        m = np.array(rows, dtype=np.float64).reshape(len(rows), 12)
+        self.size = len(rows)
+        self.km_mode = m[:, 0].astype(np.intp)
+        self.monthly_km = m[:, 1]
+        self.flights = m[:, 2].astype(np.intp)
+        self.electricity = m[:, 3].astype(np.intp)
+        self.bags = m[:, 4]
+        self.bag_size = m[:, 5].astype(np.intp)
+        self.recycling = m[:, 6] != 0
+        self.diet = m[:, 7].astype(np.intp)
+        self.water = m[:, 8].astype(np.intp)
+        self.clothes = m[:, 9]
+        self.screen = m[:, 10]
+
+    @staticmethod
+    def _encode(h: dict) -> tuple:
+        travel = h.get("travel", {})
+        home = h.get("home", {})
+        life = h.get("lifestyle", {})
+
+        transport = travel.get("transport")
+        monthly_km = float(travel.get("monthlyKm", 0) or 0)
+        km_mode = _KM_NONE
+        if transport == "car":
+            vehicle = travel.get("vehicleType")
+            if vehicle in _CAR_INDEX:
+                km_mode = _CAR_INDEX[vehicle]
+        elif transport == "public":
+            km_mode = _KM_PUBLIC
+
+        return (
+            km_mode,
+            monthly_km,
+            _FLIGHT_INDEX.get(travel.get("flightFrequency", "never"), _FLIGHT_DEFAULT),
+            _ELEC_INDEX.get(home.get("electricityUsage", "medium"), _ELEC_DEFAULT),
+            float(home.get("wasteBagsPerWeek", 0) or 0),
+            _WASTE_INDEX.get(home.get("wasteBagSize", "medium"), _WASTE_DEFAULT),
+            1 if home.get("wasteRecycling", False) else 0,
+            _DIET_INDEX.get(life.get("diet", "balanced"), _DIET_DEFAULT),
+            _WATER_INDEX.get(life.get("showerFrequency", "daily"), _WATER_DEFAULT),
+            float(life.get("newClothesMonthly", 0) or 0),
+            float(life.get("screenTimeDaily", 0) or 0),
+            0,
+        )
+
+
+def calculate_footprint_arrays(cols: HouseholdColumns) -> Dict[str, np.ndarray]:
+    """Vectorized calculate_footprint: one array per output field (floats, ratings as objects)."""
+    with np.errstate(invalid="ignore", over="ignore"):
+        # Rows without per-km emissions never multiply, as in the scalar path (inf * 0 would be NaN)
+        travel = np.where(cols.km_mode != _KM_NONE, 0.0 + cols.monthly_km * _KM_FACTORS[cols.km_mode], 0.0)
+        travel = travel + _FLIGHT_FACTORS[cols.flights] / 12
+        travel = _round_like_python(travel, 2)
+
+        home = 0.0 + _ELEC_FACTORS[cols.electricity]
+        waste = cols.bags * 4.33 * _WASTE_FACTORS[cols.bag_size]
+        waste = np.where(cols.recycling, waste * EMISSION_FACTORS["recycling"]["multiplier"], waste)
+        home = _round_like_python(home + waste, 2)
+
+        life = 0.0 + _DIET_FACTORS[cols.diet] / 12
+        life = life + _WATER_FACTORS[cols.water]
+        life = life + cols.clothes * EMISSION_FACTORS["clothing"]
+        life = life + cols.screen * 30 * EMISSION_FACTORS["screenTime"]
+        life = _round_like_python(life, 2)
+
+        total = travel + home + life
+        annual = total * 12
+        vs_avg = ((annual - GLOBAL_AVERAGE_ANNUAL_KG) / GLOBAL_AVERAGE_ANNUAL_KG) * 100
+        # NaN compares False against every bound, matching the scalar if/elif chain.
+        rating_idx = np.full(cols.size, len(RATING_BOUNDS), dtype=np.intp)
+        for j in range(len(RATING_BOUNDS) - 1, -1, -1):
+            rating_idx[annual < _RATING_BOUNDS[j]] = j
+
+    return {
+        "travel": travel,
+        "home": home,
+        "lifestyle": life,
+        "total": _round_like_python(total, 2),
+        "annualTotal": _round_like_python(annual, 2),
+        "vsAverage": _round_like_python(vs_avg, 1),
+        "rating": _RATING_LABELS[rating_idx],
+    }
+
+
+def calculate_footprints_batch(households: Sequence[dict]) -> List[Dict[str, Any]]:
+    """calculate_footprint for many households at once; results are identical to the scalar path.
+
+    Raises ValueError naming the first household whose input cannot be parsed.
+    """
+    arrays = calculate_footprint_arrays(HouseholdColumns(households))
+    cols = {k: v.tolist() for k, v in arrays.items()}
+    return [
+        {
+            "total": cols["total"][i],
+            "breakdown": {
+                "travel": cols["travel"][i],
+                "home": cols["home"][i],
+                "lifestyle": cols["lifestyle"][i],
+            },
+            "annualTotal": cols["annualTotal"][i],
+            "comparison": {
+                "vsAverage": cols["vsAverage"][i],
+                "rating": cols["rating"][i],
+            },
+        }
+        for i in range(len(households))
+    ]
+
+
+# ---- What-if scenarios -------------------------------------------------------------------
+#
+# A change is a mapping of "section.field" paths (e.g. "lifestyle.diet") to new values. Every
+# scenario is the baseline with one change (or a combination of changes touching different
+# fields) applied, and the whole grid goes through the batch calculator in one pass.
+
+SCENARIO_SECTIONS = ("travel", "home", "lifestyle")
+
+# Numeric reductions offered by default_changes: path -> [(label, function of current value)]
+_NUMERIC_REDUCTIONS = {
+    "travel.monthlyKm": [("-25%", lambda v: round(v * 0.75, 2)), ("-50%", lambda v: round(v * 0.5, 2))],
+    "home.wasteBagsPerWeek": [("-1", lambda v: max(0.0, v - 1))],
+    "lifestyle.newClothesMonthly": [("-50%", lambda v: round(v * 0.5, 2))],
+    "lifestyle.screenTimeDaily": [("-2h", lambda v: max(0.0, v - 2))],
+}
+
+
+def _get_path(household: dict, path: str) -> Any:
+    section, field = path.split(".", 1)
+    return (household.get(section) or {}).get(field)
+
+
+def apply_changes(baseline: dict, changes: Dict[str, Any]) -> dict:
+    """Copy of ``baseline`` with each "section.field" in ``changes`` set to its new value."""
+    out = {section: dict(baseline.get(section) or {}) for section in SCENARIO_SECTIONS}
+    for path, value in changes.items():
+        section, _, field = path.partition(".")
+        if section not in SCENARIO_SECTIONS or not field:
+            raise ValueError(f"Unknown change path: {path}")
+        out[section][field] = value
+    return out
+
+
+def default_changes(baseline: dict) -> List[Dict[str, Any]]:
+    """Every single-field alternative the calculator knows about for ``baseline``.
+
+    Returns [{"id", "set"}]; categorical fields get each other known value, numeric fields a
+    few reductions, and recycling is switched on if it is off.
+    """
+    changes: List[Dict[str, Any]] = []
+
+    def add(change_id: str, values: Dict[str, Any]) -> None:
+        changes.append({"id": change_id, "set": values})
+
+    transport = _get_path(baseline, "travel.transport")
+    vehicle = _get_path(baseline, "travel.vehicleType")
+    for mode in ("public", "bike", "walk"):
+        if transport != mode:
+            add(f"travel.transport={mode}", {"travel.transport": mode})
+    for v in EMISSION_FACTORS["transport"]["car"]:
+        if transport != "car" or vehicle != v:
+            add(f"travel.vehicleType={v}", {"travel.transport": "car", "travel.vehicleType": v})
+
+    categorical = {
+        "travel.flightFrequency": (EMISSION_FACTORS["flights"], "never"),
+        "home.electricityUsage": (EMISSION_FACTORS["electricity"], "medium"),
+        "home.wasteBagSize": (EMISSION_FACTORS["waste"], "medium"),
+        "lifestyle.diet": (EMISSION_FACTORS["diet"], "balanced"),
+        "lifestyle.showerFrequency": (EMISSION_FACTORS["water"], "daily"),
+    }
+    for path, (table, default) in categorical.items():
+        current = _get_path(baseline, path)
+        current = default if current is None else current
+        for value in table:
+            if value != current:
+                add(f"{path}={value}", {path: value})
+
+    if not _get_path(baseline, "home.wasteRecycling"):
+        add("home.wasteRecycling=true", {"home.wasteRecycling": True})
+
+    for path, reductions in _NUMERIC_REDUCTIONS.items():
+        try:
+            current = float(_get_path(baseline, path) or 0)
+        except (TypeError, ValueError):
+            continue
+        if current > 0:
+            for label, fn in reductions:
+                add(f"{path}{label}", {path: fn(current)})
+    return changes
+
+
+def _combine(changes: List[Dict[str, Any]], depth: int, limit: int | None = None) -> List[Dict[str, Any]]:
+    """Single changes plus combinations of up to ``depth`` changes that touch disjoint fields.
+
+    Stops as soon as the grid holds more than ``limit`` entries, so an oversized request costs
+    at most ``limit + 1`` scenarios of work.
+    """
+    out = list(changes[: limit + 1] if limit is not None else changes)
+    frontier = [(i, c) for i, c in enumerate(out)]
+    for _ in range(depth - 1):
+        nxt = []
+        for last, combo in frontier:
+            for j in range(last + 1, len(changes)):
+                if limit is not None and len(out) + len(nxt) > limit:
+                    return out + [c for _, c in nxt]
+                extra = changes[j]
+                if set(combo["set"]) & set(extra["set"]):
+                    continue
+                merged = {"id": f"{combo['id']} + {extra['id']}", "set": {**combo["set"], **extra["set"]}}
+                nxt.append((j, merged))
+        out.extend(c for _, c in nxt)
+        frontier = nxt
+    return out
+
+
+def evaluate_scenarios(
+    baseline: dict, changes: List[Dict[str, Any]], combine: int = 1, max_scenarios: int | None = None
+) -> Dict[str, Any]:
+    """Score every scenario against ``baseline`` in one batch pass.
+
+    Returns {"baseline": calculate_footprint-shaped result, "scenarios": [...], "households": [...]}
+    where each scenario carries total/annualTotal/rating and its monthly and annual savings,
+    in the order given (``households`` holds the evaluated inputs, baseline first).
+    Raises ValueError if the grid has more than ``max_scenarios`` entries.
+    """
+    grid = _combine(changes, max(1, combine), max_scenarios)
+    if max_scenarios is not None and len(grid) > max_scenarios:
+        raise ValueError(f"More than {max_scenarios} scenarios; send fewer changes or a lower combine")
+    households = [apply_changes(baseline, {})] + [apply_changes(baseline, c["set"]) for c in grid]
+    results = calculate_footprints_batch(households)
+    base = results[0]
+    scenarios = []
+    for change, res in zip(grid, results[1:]):
+        saving = base["total"] - res["total"]
+        scenarios.append({
+            "id": change["id"],
+            "changes": change["set"],
+            "total": res["total"],
+            "annualTotal": res["annualTotal"],
+            "breakdown": res["breakdown"],
+            "rating": res["comparison"]["rating"],
+            "savingsKg": round(saving, 2),
+            "annualSavingsKg": round(saving * 12, 2),
+            "savingsPct": round(saving / base["total"] * 100, 1) if base["total"] else 0.0,
+        })
+    return {"baseline": base, "scenarios": scenarios, "households": households}
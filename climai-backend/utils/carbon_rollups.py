@@ -0,0 +1,139 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+# Number of most recent predictions kept verbatim in each user's rollup document.
+ROLLUP_WINDOW = int(os.getenv("CARBON_ROLLUP_WINDOW", "30"))
+
+
+def _day_key(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d")
+
+
+Point = Tuple[ObjectId, float, datetime]
+
+
+def _rollup_update(points: List[Point]) -> Dict[str, Any]:
+    inc: Dict[str, Any] = {"count": len(points), "sum": sum(kg for _, kg, _ in points)}
+    for _, kg, ts in points:
+        day = _day_key(ts)
+        inc[f"daily.{day}.sum"] = inc.get(f"daily.{day}.sum", 0.0) + kg
+        inc[f"daily.{day}.count"] = inc.get(f"daily.{day}.count", 0) + 1
+    return {
+        "$inc": inc,
+        "$push": {"last": {"$each": [{"id": pid, "kg": kg, "t": ts} for pid, kg, ts in points], "$sort": {"t": 1}, "$slice": -ROLLUP_WINDOW}},
+        "$max": {"lastAt": max(ts for _, _, ts in points)},
+    }
+
+
+def _build_rollup(cols: Dict[str, Any], user_id: ObjectId) -> Dict[str, Any]:
+    """Compute a rollup document from the user's full prediction history."""
+    doc: Dict[str, Any] = {"count": 0, "sum": 0.0, "last": [], "lastAt": None, "daily": {}}
+    cur = cols["carbon_footprint"].find(
+        {"userId": user_id, "predicted": {"$ne": None}}, {"predicted": 1, "created_at": 1}
+    ).sort("created_at", 1)
+    for d in cur:
+        kg = float(d.get("predicted", 0))
+        ts = d.get("created_at")
+        doc["count"] += 1
+        doc["sum"] += kg
+        if ts is not None:
+            bucket = doc["daily"].setdefault(_day_key(ts), {"sum": 0.0, "count": 0})
+            bucket["sum"] += kg
+            bucket["count"] += 1
+            doc["lastAt"] = ts
+        doc["last"].append({"id": d["_id"], "kg": kg, "t": ts})
+    doc["last"] = doc["last"][-ROLLUP_WINDOW:]
+    return doc
+
+
+# Folding is idempotent per prediction: "last" keeps the ids of the newest ROLLUP_WINDOW points,
+# and an update only applies while its points are absent from it. A prediction saved while a
+# rollup is being backfilled is therefore counted exactly once, whether the backfill scan saw
+# it or not.
+
+def _fold_missing(cols: Dict[str, Any], user_id: ObjectId, points: List[Point]) -> None:
+    """Fold each of ``points`` into an existing rollup unless it is already counted there."""
+    rollups = cols["carbon_rollups"]
+    existing = rollups.find_one({"_id": user_id}, {"last": 1}) or {}
+    last = existing.get("last") or []
+    seen = {p.get("id") for p in last}
+    # With a full window, points at or before its oldest entry may have been counted and then
+    # pushed out; only newer points can be missing.
+    oldest = last[0].get("t") if len(last) >= ROLLUP_WINDOW else None
+    for point in points:
+        pid, _, ts = point
+        if pid in seen or (oldest is not None and ts <= oldest):
+            continue
+        rollups.update_one({"_id": user_id, "last.id": {"$ne": pid}}, _rollup_update([point]))
+
+
+def rebuild_rollup(cols: Dict[str, Any], user_id: ObjectId) -> Dict[str, Any]:
+    """Backfill a missing rollup from history.
+
+    If another request created the rollup first (possibly from an older scan), the predictions
+    this scan found that it lacks are folded into it instead.
+    """
+    doc = _build_rollup(cols, user_id)
+    if not doc["count"]:
+        # Nothing to store yet; the first recorded prediction builds the rollup
+        return dict(doc, _id=user_id)
+    try:
+        cols["carbon_rollups"].insert_one(dict(doc, _id=user_id))
+        return dict(doc, _id=user_id)
+    except DuplicateKeyError:
+        _fold_missing(cols, user_id, [(p["id"], p["kg"], p["t"]) for p in doc["last"] if p.get("t") is not None])
+    return cols["carbon_rollups"].find_one({"_id": user_id}) or dict(doc, _id=user_id)
+
+
+def record_predictions(cols: Dict[str, Any], user_id: ObjectId, points: Iterable[Point]) -> None:
+    """Fold newly saved predictions, as (_id, kg, created_at), into the user's rollup.
+
+    Call after the predictions are persisted. If the user has no rollup yet it is built from the
+    full history (which already contains the new points) instead of starting from zero.
+    """
+    points = [(pid, float(kg), ts) for pid, kg, ts in points if kg is not None and ts is not None]
+    if not points:
+        return
+    rollups = cols["carbon_rollups"]
+    res = rollups.update_one({"_id": user_id, "last.id": {"$nin": [pid for pid, _, _ in points]}}, _rollup_update(points))
+    if res.matched_count:
+        return
+    if rollups.find_one({"_id": user_id}, {"_id": 1}) is None:
+        rebuild_rollup(cols, user_id)
+    else:
+        # A concurrent backfill already counted some of these points
+        _fold_missing(cols, user_id, points)
+
+
+def discard_rollup(cols: Dict[str, Any], user_id: ObjectId) -> None:
+    """Drop the user's rollup after a failed fold; the next get_rollup rebuilds it from history."""
+    cols["carbon_rollups"].delete_one({"_id": user_id})
+
+
+def get_rollup(cols: Dict[str, Any], user_id: ObjectId) -> Optional[Dict[str, Any]]:
+    doc = cols["carbon_rollups"].find_one({"_id": user_id})
+    if doc is None:
+        doc = rebuild_rollup(cols, user_id)
+    return doc if doc.get("count") else None
+
+
+def bucket_series(rollup: Dict[str, Any], bucket: str) -> List[Dict[str, Any]]:
+    """Downsample the rollup's daily sums into day or ISO-week (Monday) buckets of mean kg."""
+    merged: Dict[str, List[float]] = {}
+    for day, agg in sorted((rollup.get("daily") or {}).items()):
+        key = day
+        if bucket == "weekly":
+            d = datetime.strptime(day, "%Y-%m-%d")
+            key = _day_key(d - timedelta(days=d.weekday()))
+        acc = merged.setdefault(key, [0.0, 0])
+        acc[0] += float(agg.get("sum", 0.0))
+        acc[1] += int(agg.get("count", 0))
+    return [
+        {"t": key, "kg": round(total / n, 2), "n": n}
+        for key, (total, n) in merged.items()
+        if n
+    ]
@@ -0,0 +1,143 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+from utils.db import get_collections
+
+logger = logging.getLogger(__name__)
+
+# Matches the history window the chat route has always accepted from clients.
+MAX_TURNS = 12
+
+
+class _Session:
+    __slots__ = ("owner", "turns", "touched")
+
+    def __init__(self, owner: Optional[str], turns=()):
+        self.owner = owner
+        self.turns: deque = deque(turns, maxlen=MAX_TURNS)  # (role, text) tuples
+        self.touched = time.monotonic()
+
+
+class ConversationStore:
+    """Per-session ring buffer of recent chat turns kept in process memory.
+
+    Sessions idle for longer than ``ttl_seconds`` (or beyond ``max_sessions``, least recently
+    used first) are evicted whenever a session is opened or appended to. With ``spill``
+    enabled, evicted sessions are written to the ``chat_sessions`` Mongo collection and
+    reloaded transparently on their next turn; a TTL index on ``updated_at`` (see
+    utils.db) drops spilled sessions nobody resumes.
+    """
+
+    def __init__(self, ttl_seconds: float = 1800.0, max_sessions: int = 10000, spill: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.spill = spill
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, session_id: Optional[str], owner: Optional[str], seed: List[Dict[str, str]] = ()) -> Tuple[str, List[Dict[str, str]]]:
+        """Return (session_id, history) for an existing session, or start a new one.
+
+        A session belonging to a different user is never reused; a fresh id is issued instead.
+        """
+        evicted: List[Tuple[str, _Session]] = []
+        with self._lock:
+            evicted = self._evict_locked()
+            sess = self._sessions.get(session_id) if session_id else None
+            if sess is not None:
+                self._sessions.move_to_end(session_id)
+                sess.touched = time.monotonic()
+        self._spill(evicted)
+
+        if sess is None and session_id and self.spill:
+            sess = self._load(session_id)
+            if sess is not None:
+                with self._lock:
+                    self._sessions[session_id] = sess
+
+        if sess is None or sess.owner != owner:
+            session_id = uuid.uuid4().hex
+            sess = _Session(owner, ((t["role"], t["text"]) for t in seed))
+            with self._lock:
+                self._sessions[session_id] = sess
+        return session_id, [{"role": role, "text": text} for role, text in sess.turns]
+
+    def append(self, session_id: str, role: str, text: str) -> None:
+        with self._lock:
+            sess = self._sessions.get(session_id)
+            if sess is not None:
+                sess.turns.append((role, text))
+                sess.touched = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            evicted = self._evict_locked()
+        self._spill(evicted)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_locked(self) -> List[Tuple[str, _Session]]:
+        out = []
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            sid, sess = next(iter(self._sessions.items()))
+            if sess.touched >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            out.append((sid, sess))
+        return out
+
+    def _spill(self, evicted: List[Tuple[str, _Session]]) -> None:
+        if not self.spill or not evicted:
+            return
+        cols = get_collections()
+        if not cols:
+            return
+        for sid, sess in evicted:
+            try:
+                cols["chat_sessions"].replace_one(
+                    {"_id": sid},
+                    {
+                        "owner": sess.owner,
+                        "turns": [{"role": role, "text": text} for role, text in sess.turns],
+                        "updated_at": datetime.utcnow(),
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning("Failed to spill chat session %s: %s", sid, e)
+
+    def _load(self, session_id: str) -> Optional[_Session]:
+        cols = get_collections()
+        if not cols:
+            return None
+        try:
+            doc = cols["chat_sessions"].find_one_and_delete({"_id": session_id})
+        except Exception as e:
+            logger.warning("Failed to load chat session %s: %s", session_id, e)
+            return None
+        if not doc:
+            return None
+        return _Session(doc.get("owner"), ((t.get("role"), t.get("text")) for t in doc.get("turns", [])))
+
+
+_store: Optional[ConversationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ConversationStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConversationStore(
+                    ttl_seconds=float(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800")),
+                    max_sessions=int(os.getenv("CHAT_SESSION_MAX", "10000")),
+                    spill=os.getenv("CHAT_SESSION_SPILL", "0") == "1",
+                )
+    return _store
@@ -0,0 +1,138 @@
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+try:
+    import brotli
+except Exception:  # pragma: no cover - optional; gzip is always available
+    brotli = None  # type: ignore
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "application/xml", "image/svg+xml"}
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class ResponseCompressor:
+    """Content-Encoding negotiation for response bodies (br when the brotli module is
+    installed, otherwise gzip).
+
+    Bodies under ``min_bytes`` go out as is. Streamed bodies are compressed chunk by chunk and
+    flushed every ``flush_bytes`` of input, so ndjson readers still see rows as they come.
+    """
+
+    def __init__(self, enabled: bool, min_bytes: int, gzip_level: int, brotli_quality: int, flush_bytes: int):
+        self.enabled = enabled
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.flush_bytes = flush_bytes
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    @classmethod
+    def from_env(cls) -> "ResponseCompressor":
+        return cls(
+            enabled=os.getenv("COMPRESS_ENABLED", "1") != "0",
+            min_bytes=int(os.getenv("COMPRESS_MIN_BYTES", "1024")),
+            gzip_level=int(os.getenv("COMPRESS_GZIP_LEVEL", "6")),
+            brotli_quality=int(os.getenv("COMPRESS_BROTLI_QUALITY", "4")),
+            flush_bytes=int(os.getenv("COMPRESS_STREAM_FLUSH_BYTES", "16384")),
+        )
+
+    def _compressor(self, encoding: str):
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+    def _stream(self, chunks: Iterable, encoding: str) -> Iterator[bytes]:
+        comp = self._compressor(encoding)
+        pending = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                out = comp.compress(chunk)
+                pending += len(chunk)
+                if pending >= self.flush_bytes:
+                    out += comp.flush()
+                    pending = 0
+                if out:
+                    yield out
+            yield comp.finish()
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def _compressible(self, response) -> bool:
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or "Content-Encoding" in response.headers:
+            return False
+        if "no-transform" in response.headers.get("Cache-Control", ""):
+            return False
+        mimetype = response.mimetype or ""
+        return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+    def process(self, request, response):
+        """Compress ``response`` for ``request`` if worthwhile; returns the response."""
+        if not self.enabled or not self._compressible(response):
+            return response
+        streamed = response.is_streamed
+        if not streamed and (response.content_length or 0) < self.min_bytes:
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        if streamed:
+            response.response = self._stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            comp = self._compressor(encoding)
+            response.set_data(comp.compress(response.get_data()) + comp.finish())
+        response.headers["Content-Encoding"] = encoding
+        # The encoded bytes differ from the identity body; a weak tag still matches
+        # If-None-Match (utils.http_cache compares weakly), so revalidation keeps working.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_app(app, compressor: Optional[ResponseCompressor] = None) -> ResponseCompressor:
+    """Compress JSON/text responses per Accept-Encoding (COMPRESS_ENABLED=0 disables)."""
+    compressor = compressor or ResponseCompressor.from_env()
+    if not compressor.enabled:
+        return compressor
+    from flask import request
+
+    @app.after_request
+    def _compress(response):
+        return compressor.process(request, response)
+
+    return compressor
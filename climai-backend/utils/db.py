@@ -1,28 +1,218 @@
 import os
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List, Tuple
 
 from dotenv import load_dotenv
 
+from utils.metrics import MongoCommandTimer, metrics
+
 try:
     from pymongo import MongoClient
     from pymongo.server_api import ServerApi
+    from pymongo import monitoring
 except Exception:  # pragma: no cover - allow project to run without pymongo installed yet
     MongoClient = None  # type: ignore
     ServerApi = None  # type: ignore
+    monitoring = None  # type: ignore
 
 
 _client: Optional[MongoClient] = None  # type: ignore
 _db = None
 _collections: Optional[Dict[str, Any]] = None
+_index_report: Optional[Dict[str, List[str]]] = None
+_init_args: Optional[Tuple[str, str]] = None  # (uri, db_name) used to recreate the client after fork
+_client_lock = threading.Lock()  # serialises lazy client recreation in _ensure_client
+
+# Pool settings read from the environment: env var -> (MongoClient option, type)
+POOL_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_READ_PREFERENCE": ("readPreference", str),
+}
+
+
+class _PoolStats(monitoring.ConnectionPoolListener if monitoring else object):  # type: ignore[misc]
+    """Connection pool listener tracking checkout waits, connections in use and failures."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.open = 0
+            self.in_use = 0
+            self.checkouts = 0
+            self.checkout_failures: Dict[str, int] = {}
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.pool_cleared = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "openConnections": self.open,
+                "inUse": self.in_use,
+                "checkouts": self.checkouts,
+                "checkoutFailures": dict(self.checkout_failures),
+                "checkoutWaitMeanMs": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "checkoutWaitMaxMs": round(self.wait_max_ms, 3),
+                "poolCleared": self.pool_cleared,
+            }
+
+    def connection_checked_out(self, event) -> None:
+        wait_ms = (getattr(event, "duration", None) or 0.0) * 1000.0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def connection_check_out_failed(self, event) -> None:
+        reason = str(getattr(event, "reason", "unknown"))
+        with self._lock:
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.open = max(0, self.open - 1)
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self.pool_cleared += 1
+
+    # Remaining ConnectionPoolListener hooks are not tracked
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+
+pool_stats = _PoolStats()
+
+
+def _client_options() -> Dict[str, Any]:
+    opts: Dict[str, Any] = {"connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))}
+    for env, (option, cast) in POOL_OPTIONS.items():
+        raw = os.getenv(env)
+        if raw:
+            opts[option] = cast(raw)
+    return opts
+
+
+def _event_listeners() -> List[Any]:
+    listeners: List[Any] = [pool_stats]
+    if metrics.enabled:
+        listeners.append(MongoCommandTimer())
+    return listeners
+
+
+def _create_client(uri: str, db_name: str) -> None:
+    # Use stable server API for Atlas and SRV URIs; also works for localhost
+    _bind_client(MongoClient(uri, server_api=ServerApi("1"), event_listeners=_event_listeners(), **_client_options()), db_name)
+
 
+def _bind_client(client: Any, db_name: str) -> None:
+    global _client, _db, _collections
+    db = client[db_name]
+    _db = db
+    _collections = {
+        "users": db["users"],
+        "climate_data": db["climate_data"],
+        "carbon_footprint": db["carbon_footprint"],
+        "chat_sessions": db["chat_sessions"],
+        "carbon_rollups": db["carbon_rollups"],
+    }
+    # Bound last: _ensure_client's unlocked check treats a set _client as fully bound
+    _client = client
+
+
+def _after_fork_in_child() -> None:
+    # MongoClient is not fork-safe: drop the parent's client; get_* recreates it on first use.
+    global _client, _db, _collections, _client_lock
+    _client = _db = _collections = None
+    _client_lock = threading.Lock()  # may have been held by another parent thread at fork time
+    pool_stats.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _ensure_client() -> None:
+    if _client is not None or _init_args is None:
+        return
+    with _client_lock:
+        # Another thread may have recreated the client while we waited
+        if _client is None and _init_args is not None:
+            _create_client(*_init_args)
+
+
+# Indexes the queries in routes/ rely on: collection -> [(key spec, create_index options)].
+# (userId, created_at, _id) serves the per-user history scans, keyset pagination and
+# latest-prediction lookups in both sort directions.
+MANAGED_INDEXES: Dict[str, List[Tuple[List[Tuple[str, int]], Dict[str, Any]]]] = {
+    "users": [
+        ([("email", 1)], {"unique": True}),
+    ],
+    "carbon_footprint": [
+        ([("userId", 1), ("created_at", -1), ("_id", -1)], {}),
+    ],
+}
+
+
+def _managed_indexes() -> Dict[str, List[Tuple[List[Tuple[str, int]], Dict[str, Any]]]]:
+    """MANAGED_INDEXES plus the specs that depend on settings (read here, after .env is loaded)."""
+    specs = dict(MANAGED_INDEXES)
+    # Spilled chat sessions (utils.chat_sessions) expire one session TTL after they were written
+    ttl = max(1, int(float(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))))
+    specs["chat_sessions"] = [([("updated_at", 1)], {"expireAfterSeconds": ttl})]
+    return specs
+
+
+def use_client(client: Any, db_name: Optional[str] = None) -> Dict[str, Any]:
+    """Adopt an already constructed client (e.g. mongomock in benchmarks) instead of MONGO_URI.
+
+    The client is not recreated after a fork, unlike one created by init_mongo.
+    """
+    global _init_args
+    _init_args = None
+    _bind_client(client, db_name or os.getenv("MONGO_DB", "climai"))
+    return _collections  # type: ignore[return-value]
 
-def init_mongo(uri: Optional[str] = None, db_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+
+def init_mongo(
+    uri: Optional[str] = None, db_name: Optional[str] = None, ping: Optional[bool] = None
+) -> Optional[Dict[str, Any]]:
     """Initialize a MongoDB client and prepare named collections.
 
     Reads MONGO_URI and MONGO_DB from environment if not provided.
     Returns a dict of collections on success, or None if URI is not configured.
+    With ``ping`` False (default: MONGO_STARTUP_PING) the connectivity and index check is left
+    to a later check_connection() call; creating the client itself does no network I/O.
     """
-    global _client, _db, _collections
+    global _init_args
 
     # Load .env located in the backend folder explicitly to avoid CWD issues
     backend_env = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
@@ -38,34 +228,99 @@ def init_mongo(uri: Optional[str] = None, db_name: Optional[str] = None) -> Opti
     if MongoClient is None:
         raise RuntimeError("pymongo is not installed. Please install dependencies from requirements.txt")
 
-    # Use stable server API for Atlas and SRV URIs; also works for localhost
-    _client = MongoClient(uri, server_api=ServerApi("1"), connectTimeoutMS=10000)
-    _db = _client[db_name]
-    _collections = {
-        "users": _db["users"],
-        "climate_data": _db["climate_data"],
-        "carbon_footprint": _db["carbon_footprint"],
-    }
+    _init_args = (uri, db_name)
+    _create_client(uri, db_name)
 
-    # Optional: light connectivity check (won't raise on missing network if skipped by caller)
-    try:
-        _client.admin.command("ping")
-        # Ensure index for users.email
-        _collections["users"].create_index("email", unique=True)
-    except Exception:
-        # Leave initialization in place; caller can handle connectivity errors later
-        pass
+    if ping is None:
+        ping = os.getenv("MONGO_STARTUP_PING", "1") == "1"
+    if ping:
+        try:
+            check_connection()
+        except Exception:
+            # Leave initialization in place; caller can handle connectivity errors later
+            pass
 
     return _collections
 
 
+def check_connection() -> Dict[str, List[str]]:
+    """Ping the server and reconcile MANAGED_INDEXES; returns the index report. Raises if unreachable."""
+    client = get_client()
+    if client is None:
+        raise RuntimeError("MongoDB not initialized")
+    client.admin.command("ping")
+    return ensure_indexes(create=os.getenv("MONGO_AUTO_INDEX", "1") == "1")
+
+
+def ensure_indexes(create: bool = True) -> Dict[str, List[str]]:
+    """Compare MANAGED_INDEXES with the live collections and optionally create what is missing.
+
+    Returns a report {"present", "created", "missing", "errors"} of "collection:key_spec" strings;
+    "missing" lists indexes still absent afterwards (e.g. when create=False).
+    """
+    global _index_report
+    report: Dict[str, List[str]] = {"present": [], "created": [], "missing": [], "errors": []}
+    if not _collections:
+        return report
+    for name, specs in _managed_indexes().items():
+        coll = _collections.get(name)
+        if coll is None:
+            continue
+        try:
+            existing = {
+                tuple((k, int(d)) for k, d in info.get("key", [])): info for info in coll.index_information().values()
+            }
+        except Exception as e:
+            report["errors"].append(f"{name}: {e}")
+            continue
+        for keys, options in specs:
+            label = f"{name}:" + ",".join(f"{k}_{d}" for k, d in keys)
+            info = existing.get(tuple(keys))
+            if info is not None:
+                ttl = options.get("expireAfterSeconds")
+                if ttl is not None and info.get("expireAfterSeconds") != ttl and create:
+                    # TTL setting changed since the index was built: update it in place
+                    try:
+                        coll.database.command("collMod", name, index={"keyPattern": dict(keys), "expireAfterSeconds": ttl})
+                        report["created"].append(f"{label} (expireAfterSeconds={ttl})")
+                    except Exception as e:
+                        report["errors"].append(f"{label}: {e}")
+                else:
+                    report["present"].append(label)
+                continue
+            if not create:
+                report["missing"].append(label)
+                continue
+            try:
+                coll.create_index(keys, **options)
+                report["created"].append(label)
+            except Exception as e:
+                report["errors"].append(f"{label}: {e}")
+                report["missing"].append(label)
+    _index_report = report
+    return report
+
+
+def get_index_report() -> Optional[Dict[str, List[str]]]:
+    return _index_report
+
+
 def get_client() -> Optional[MongoClient]:  # type: ignore
+    _ensure_client()
     return _client
 
 
 def get_db():
+    _ensure_client()
     return _db
 
 
 def get_collections() -> Optional[Dict[str, Any]]:
+    _ensure_client()
     return _collections
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    out = pool_stats.snapshot()
+    out["options"] = {k: v for k, v in _client_options().items()}
+    return out
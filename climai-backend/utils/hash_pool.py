@@ -0,0 +1,155 @@
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from utils.auth import hash_password, verify_password_needs_update
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing pool cannot take more work; callers answer 429."""
+
+
+# Raised by HashPool when an operation outlives ``timeout``; callers answer 503.
+HashPoolTimeout = FutureTimeoutError
+
+
+class HashPool:
+    """Runs password hashing and verification off the request threads.
+
+    At most ``max_pending`` operations (running plus queued) are accepted; beyond that
+    ``HashPoolBusy`` is raised immediately so a login burst cannot pile up request threads.
+    With ``workers=0`` the work runs inline on the calling thread (still bounded).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+        start_method: Optional[str] = None,
+    ):
+        # Settings left as None come from AUTH_HASH_* on first use, i.e. after create_app has
+        # loaded .env.
+        self._settings = (workers, max_pending, timeout, start_method)
+        self._configured = False
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._counters: Dict[str, int] = {"rejected": 0, "timeouts": 0, "errors": 0, "rehashed": 0}
+        self._latency: Dict[str, deque] = {"hash": deque(maxlen=512), "verify": deque(maxlen=512)}
+
+    def _configure(self) -> None:
+        with self._lock:
+            if self._configured:
+                return
+            workers, max_pending, timeout, start_method = self._settings
+            if workers is None:
+                workers = int(os.getenv("AUTH_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+            if max_pending is None:
+                max_pending = int(os.getenv("AUTH_HASH_MAX_PENDING", str(max(1, workers) * 8)))
+            if timeout is None:
+                timeout = float(os.getenv("AUTH_HASH_TIMEOUT_SECONDS", "10"))
+            self.workers = workers
+            self.max_pending = max_pending
+            self.timeout = timeout
+            # Not fork: the workers would inherit the request threads' locks and the Mongo client.
+            self.start_method = start_method or os.getenv("AUTH_HASH_START_METHOD") or "spawn"
+            self._slots = threading.BoundedSemaphore(max_pending)
+            self._configured = True
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # A pool inherited across fork is unusable in the child; build a fresh one there.
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(self.start_method)
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _run(self, op: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._configured:
+            self._configure()
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise HashPoolBusy(op)
+        with self._lock:
+            self._pending += 1
+        t0 = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                try:
+                    result = fn(*args)
+                finally:
+                    self._release()
+            else:
+                try:
+                    future = self._get_executor().submit(fn, *args)
+                except BaseException:
+                    self._release()
+                    raise
+                # The slot is held until the worker finishes, not until we stop waiting: a
+                # timed-out hash keeps its worker busy, so it still counts against max_pending.
+                future.add_done_callback(lambda _f: self._release())
+                result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._count("timeouts")
+            raise
+        except BrokenProcessPool:
+            # A worker died (OOM kill, etc.); the next call starts a fresh pool.
+            self._count("errors")
+            with self._lock:
+                self._executor = None
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+        with self._lock:
+            self._latency[op].append(time.perf_counter() - t0)
+        return result
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] += 1
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", hash_password, password)
+
+    def verify(self, password: str, password_hash: str):
+        """Return (valid, needs_update) for ``password`` against ``password_hash``."""
+        return self._run("verify", verify_password_needs_update, password, password_hash)
+
+    def record_rehash(self) -> None:
+        self._count("rehashed")
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self._configured:
+            self._configure()
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["pending"] = self._pending
+            samples = {op: sorted(v) for op, v in self._latency.items()}
+        out["workers"] = self.workers
+        out["maxPending"] = self.max_pending
+        for op, xs in samples.items():
+            out[f"{op}LatencyMs"] = {
+                "count": len(xs),
+                "p50": round(xs[len(xs) // 2] * 1000.0, 2) if xs else None,
+                "p95": round(xs[min(len(xs) - 1, int(len(xs) * 0.95))] * 1000.0, 2) if xs else None,
+                "max": round(xs[-1] * 1000.0, 2) if xs else None,
+            }
+        return out
+
+
+hash_pool = HashPool()
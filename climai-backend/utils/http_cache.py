@@ -0,0 +1,64 @@
+import hashlib
+from typing import Any, Optional
+
+from flask import current_app, make_response, request
+
+from utils.openweather import snapshot_cache
+
+
+def _policies() -> dict:
+    ttl = max(0, int(snapshot_cache.ttl_seconds))
+    return {
+        # Same for every caller and fixed until the upstream snapshot expires
+        "region.critical": f"public, max-age={ttl}",
+        # Upstream-only, but the city can come from the caller's token
+        "weather": f"private, max-age={ttl}",
+        # Change whenever the user saves a prediction: always revalidate (cheap with the ETag)
+        "region.climate": "private, no-cache",
+        "carbon.impact": "private, no-cache",
+        "carbon.history": "private, no-cache",
+    }
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag value (unquoted) for the given version components."""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _apply(resp, etag: str, policy: str):
+    cache_control = _policies()[policy]
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = cache_control
+    if cache_control.startswith("private"):
+        resp.vary.add("Authorization")
+    return resp
+
+
+def not_modified(etag: Optional[str], policy: str):
+    """A 304 response when the request's If-None-Match already holds ``etag``, else None.
+
+    Call before doing the work the ETag stands for. The tag is sent back in the form the
+    client holds it: utils.compression weakens the tag of compressed 200s.
+    """
+    if etag is None or not request.if_none_match.contains_weak(etag):
+        return None
+    resp = _apply(current_app.response_class(status=304), etag, policy)
+    if not request.if_none_match.contains(etag):
+        resp.set_etag(etag, weak=True)
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def conditional(rv, policy: str, etag: Optional[str] = None):
+    """Attach ETag and Cache-Control to a successful response; 304 if the client has it.
+
+    Without an ``etag`` the body hash is used (not for streamed bodies, which are left as is).
+    """
+    resp = make_response(rv)
+    if resp.status_code != 200:
+        return resp
+    if etag is None:
+        if resp.is_streamed:
+            return resp
+        etag = make_etag(resp.get_data())
+    return not_modified(etag, policy) or _apply(resp, etag, policy)
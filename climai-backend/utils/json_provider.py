@@ -0,0 +1,64 @@
+import os
+from datetime import date, datetime
+from typing import Any
+
+from bson.objectid import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional speed-up, falls back to the stdlib encoder
+    orjson = None  # type: ignore
+
+
+def _default(o: Any) -> Any:
+    """Types Mongo documents carry: ObjectId as its hex string, dates as ISO 8601."""
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes ObjectId and datetime values directly.
+
+    Uses orjson when it is installed (JSON_ENCODER=stdlib forces the standard library
+    encoder). Output matches the stdlib encoder except that non-ASCII text is written as UTF-8
+    rather than \\u escapes and non-finite floats become null instead of invalid NaN/Infinity.
+    """
+
+    default = staticmethod(_default)  # type: ignore[assignment]
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and os.getenv("JSON_ENCODER", "orjson") != "stdlib"
+
+    def _orjson_options(self, indent: bool) -> int:
+        opts = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        if indent:
+            opts |= orjson.OPT_INDENT_2
+        return opts
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """Serialize ``obj`` to UTF-8 JSON bytes (for streaming and response bodies)."""
+        if self.use_orjson:
+            try:
+                return orjson.dumps(obj, default=_default, option=self._orjson_options(indent))
+            except orjson.JSONEncodeError:
+                pass  # e.g. integers beyond 64 bits; the stdlib encoder handles those
+        return super().dumps(obj, **({"indent": 2} if indent else {"separators": (",", ":")})).encode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if self.use_orjson and not (set(kwargs) - {"indent", "separators"}):
+            return self.dumps_bytes(obj, bool(kwargs.get("indent"))).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,227 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from pymongo import monitoring
+except Exception:  # pragma: no cover - allow project to run without pymongo installed yet
+    monitoring = None  # type: ignore
+
+# Latency buckets (seconds) shared by every histogram.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, Labels]
+
+HELP = {
+    "http_requests_total": ("counter", "HTTP requests by blueprint, endpoint, method and status."),
+    "http_request_errors_total": ("counter", "HTTP requests that raised or returned a 5xx status."),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being handled."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency."),
+    "span_duration_seconds": ("histogram", "Latency of instrumented sub-steps (Mongo, OpenWeather, Gemini, model)."),
+    "span_errors_total": ("counter", "Instrumented sub-steps that raised."),
+}
+
+
+class _Shard:
+    """One thread's private counters; only that thread writes to it, so recording takes no lock."""
+
+    __slots__ = ("thread", "counters", "histograms")
+
+    def __init__(self, thread: threading.Thread):
+        self.thread = thread
+        self.counters: Dict[SeriesKey, float] = {}
+        self.histograms: Dict[SeriesKey, List[float]] = {}  # bucket counts..., +Inf count, sum
+
+
+class Metrics:
+    """Counters, gauges and histograms aggregated per thread and merged when scraped.
+
+    Each recording thread gets its own shard (registered once, under a lock); the hot path only
+    touches thread-local dictionaries. Shards of finished threads are folded into a retired
+    total at scrape time so short-lived request threads do not accumulate.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        # Set from METRICS_ENABLED by init_app, once create_app has loaded .env
+        self.enabled = True
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[_Shard] = []
+        self._retired = _Shard(threading.current_thread())
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0.0) + value
+
+    def gauge_add(self, name: str, labels: Labels = (), delta: float = 1.0) -> None:
+        # Gauges are sums of per-thread deltas; a request's +1/-1 happen on the same thread.
+        self.inc(name, labels, delta)
+
+    def observe(self, name: str, labels: Labels, seconds: float) -> None:
+        histograms = self._shard().histograms
+        key = (name, labels)
+        h = histograms.get(key)
+        if h is None:
+            h = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        i = 0
+        for bound in self.buckets:
+            if seconds <= bound:
+                break
+            i += 1
+        h[i] += 1
+        h[-1] += seconds
+
+    @staticmethod
+    def _merge_into(dst: _Shard, src: _Shard) -> None:
+        for key, v in list(src.counters.items()):
+            dst.counters[key] = dst.counters.get(key, 0.0) + v
+        for key, h in list(src.histograms.items()):
+            cur = dst.histograms.get(key)
+            if cur is None:
+                dst.histograms[key] = list(h)
+            else:
+                for i, v in enumerate(h):
+                    cur[i] += v
+
+    def collect(self) -> _Shard:
+        """Merged view of every shard (a racing increment may land in the next scrape)."""
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    live.append(shard)
+                else:
+                    self._merge_into(self._retired, shard)
+            self._shards = live
+            total = _Shard(threading.current_thread())
+            self._merge_into(total, self._retired)
+            for shard in live:
+                self._merge_into(total, shard)
+        return total
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        total = self.collect()
+        series: Dict[str, List[str]] = {}
+        for (name, labels), v in sorted(total.counters.items()):
+            series.setdefault(name, []).append(f"{name}{_fmt_labels(labels)} {_fmt_value(v)}")
+        for (name, labels), h in sorted(total.histograms.items()):
+            lines = series.setdefault(name, [])
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, h):
+                cumulative += count
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', _fmt_value(bound)),))} {_fmt_value(cumulative)}")
+            cumulative += h[len(self.buckets)]
+            lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {_fmt_value(cumulative)}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-1]!r}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {_fmt_value(cumulative)}")
+        out = []
+        for name in sorted(series):
+            kind, help_text = HELP.get(name, ("untyped", name))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(series[name])
+        return "\n".join(out) + "\n"
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a sub-step into span_duration_seconds{span=name}; failures also count span_errors_total."""
+    if not metrics.enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    labels = (("span", name),)
+    try:
+        yield
+    except Exception:
+        metrics.inc("span_errors_total", labels)
+        raise
+    finally:
+        metrics.observe("span_duration_seconds", labels, time.perf_counter() - t0)
+
+
+class MongoCommandTimer(monitoring.CommandListener if monitoring else object):  # type: ignore[misc]
+    """Feeds every Mongo command's server round trip into span_duration_seconds{span="mongo.<command>"}."""
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        metrics.observe("span_duration_seconds", (("span", f"mongo.{event.command_name}"),), event.duration_micros / 1e6)
+
+    def failed(self, event) -> None:
+        labels = (("span", f"mongo.{event.command_name}"),)
+        metrics.inc("span_errors_total", labels)
+        metrics.observe("span_duration_seconds", labels, event.duration_micros / 1e6)
+
+
+def init_app(app) -> None:
+    """Record per-endpoint request counts, errors, in-flight gauges and latency histograms.
+
+    Reads METRICS_ENABLED here rather than at import, so a value from .env applies.
+    """
+    metrics.enabled = os.getenv("METRICS_ENABLED", "1") == "1"
+    if not metrics.enabled:
+        return
+    from flask import g, request
+
+    def _labels() -> Labels:
+        # Unmatched URLs share one series so scanners cannot blow up the label cardinality.
+        endpoint = request.url_rule.endpoint if request.url_rule is not None else "unmatched"
+        return (("blueprint", request.blueprint or ""), ("endpoint", endpoint), ("method", request.method))
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_started = time.perf_counter()
+        g._metrics_labels = _labels()
+        metrics.gauge_add("http_requests_in_flight", g._metrics_labels[:2], 1)
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc: Optional[BaseException]):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return
+        labels = g.pop("_metrics_labels")
+        status = 500 if exc is not None else g.pop("_metrics_status", 500)
+        metrics.gauge_add("http_requests_in_flight", labels[:2], -1)
+        metrics.observe("http_request_duration_seconds", labels, time.perf_counter() - started)
+        metrics.inc("http_requests_total", labels + (("status", str(status)),))
+        if exc is not None or status >= 500:
+            metrics.inc("http_request_errors_total", labels)
@@ -1,9 +1,10 @@
 import os
 import pickle
 from functools import lru_cache
-from typing import Any, Dict, Optional, Tuple, List
+from typing import Any, Dict, Optional, Tuple, List, TYPE_CHECKING
 
-import pandas as pd
+if TYPE_CHECKING:  # pandas is imported on first use so importing this module stays cheap
+    import pandas as pd
 
 # Base directory for ML artifacts; defaults to backend/ml
 DEFAULT_MODEL_DIR = os.path.abspath(
@@ -108,7 +109,7 @@ def get_all() -> Dict[str, Any]:
     }
 
 
-def transform_inputs(payload: Dict[str, Any], schema: Optional[Dict[str, str]] = None) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+def transform_inputs(payload: Dict[str, Any], schema: Optional[Dict[str, str]] = None) -> Tuple["pd.DataFrame", Optional["pd.DataFrame"]]:
     """Convert raw JSON payload into model-ready matrices.
 
     - Builds a one-row DataFrame from payload
@@ -117,6 +118,8 @@ def transform_inputs(payload: Dict[str, Any], schema: Optional[Dict[str, str]] =
 
     Returns (X_num_scaled_or_original, X_cat_encoded_or_None)
     """
+    import pandas as pd
+
     df = pd.DataFrame([payload])
 
     enc = get_encoder()
@@ -160,8 +163,21 @@ def get_expected_feature_names_for_model(model: Any) -> Optional[List[str]]:
     return None
 
 
-def align_payload_to_expected(payload: Dict[str, Any], expected: List[str]) -> pd.DataFrame:
-    # Build a single-row DataFrame matching expected columns.
+def align_payload_to_expected(payload: Dict[str, Any], expected: List[str]) -> "pd.DataFrame":
+    import pandas as pd
+
+    return pd.DataFrame([_align_row(payload, expected)])
+
+
+def align_payloads_to_expected(payloads: List[Dict[str, Any]], expected: List[str]) -> "pd.DataFrame":
+    """Multi-row align_payload_to_expected: one row per payload, in order."""
+    import pandas as pd
+
+    return pd.DataFrame([_align_row(p, expected) for p in payloads], columns=expected)
+
+
+def _align_row(payload: Dict[str, Any], expected: List[str]) -> Dict[str, Any]:
+    # Build a single row (column -> value) matching expected columns.
     # Strategy:
     # 1) Direct key match
     # 2) Normalized key match
@@ -238,14 +254,16 @@ def align_payload_to_expected(payload: Dict[str, Any], expected: List[str]) -> p
         # default fill
         out[col] = None
 
-    return pd.DataFrame([out])
+    return out
 
 
-def apply_label_encoders(df: pd.DataFrame, enc: Any) -> pd.DataFrame:
+def apply_label_encoders(df: "pd.DataFrame", enc: Any) -> "pd.DataFrame":
     """Apply a dict of sklearn LabelEncoders per-column. Unseen labels map to first class.
 
     If enc is not a dict of LabelEncoders, returns df unchanged.
     """
+    import pandas as pd
+
     try:
         import numpy as np  # type: ignore
     except Exception:
@@ -256,10 +274,19 @@ def apply_label_encoders(df: pd.DataFrame, enc: Any) -> pd.DataFrame:
     out = df.copy()
     for col, le in enc.items():
         if col in out.columns and hasattr(le, "classes_") and hasattr(le, "transform"):
+            if out.shape[0] != 1:
+                # Multi-row: map unseen labels to the first class per row, as single rows do
+                try:
+                    vals = out[col].astype(str)
+                    vals = vals.where(vals.isin(set(map(str, le.classes_))), str(le.classes_[0]))
+                    out[col] = le.transform(vals)
+                except Exception:
+                    out[col] = 0
+                continue
             val = out[col].iloc[0]
             try:
                 # Direct transform if valid
-                out[col] = le.transform([str(val)]) if out.shape[0] == 1 else le.transform(out[col].astype(str))
+                out[col] = le.transform([str(val)])
             except Exception:
                 # Map unseen to first class
                 try:
@@ -0,0 +1,189 @@
+import os
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from flask import has_request_context, request
+
+from utils.metrics import span
+
+GEOCODE_URL = "http://api.openweathermap.org/geo/1.0/direct"
+AIR_POLLUTION_URL = "http://api.openweathermap.org/data/2.5/air_pollution"
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+TIMEOUT_SECONDS = 10
+
+# WSGI environ key under which the ASGI gateway hands over responses it already fetched.
+PREFETCH_ENVIRON_KEY = "climai.openweather"
+
+SPAN_NAMES = {GEOCODE_URL: "openweather.geocode", AIR_POLLUTION_URL: "openweather.air_pollution", WEATHER_URL: "openweather.weather"}
+
+RequestKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def request_key(url: str, params: Dict[str, Any]) -> RequestKey:
+    return url, tuple(sorted((k, str(v)) for k, v in params.items()))
+
+
+class UpstreamResponse:
+    """The parts of a ``requests.Response`` the routes use, for responses fetched elsewhere."""
+
+    def __init__(self, status_code: int, payload: Any):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self) -> Any:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            err = requests.exceptions.HTTPError(f"{self.status_code} Error from OpenWeather")
+            err.response = self  # type: ignore[attr-defined]
+            raise err
+
+
+class SnapshotCache:
+    """TTL cache of successful OpenWeather responses, each tagged with a content version.
+
+    The version is a hash of the payload, so every worker process derives the same value for
+    the same upstream data; routes build their ETags from it.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[RequestKey, Tuple[float, str, UpstreamResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def configure(self, ttl_seconds: float, max_entries: int) -> None:
+        """Apply new limits; entries cached under the old TTL are dropped."""
+        with self._lock:
+            self.ttl_seconds = ttl_seconds
+            self.max_entries = max_entries
+            self._entries.clear()
+
+    def get(self, key: RequestKey) -> Optional[Tuple[str, UpstreamResponse]]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1], entry[2]
+
+    def put(self, key: RequestKey, status_code: int, payload: Any) -> UpstreamResponse:
+        resp = UpstreamResponse(status_code, payload)
+        if self.ttl_seconds <= 0 or status_code != 200:
+            return resp
+        version = hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"), digest_size=8).hexdigest()
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, version, resp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["stores"] += 1
+        return resp
+
+    def version(self, keys: Iterable[RequestKey]) -> Optional[str]:
+        """Combined version of ``keys``, or None unless every one is cached and fresh."""
+        parts: List[str] = []
+        for key in keys:
+            hit = self.get(key)
+            if hit is None:
+                return None
+            parts.append(hit[0])
+        return ".".join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["size"] = len(self._entries)
+        out["ttlSeconds"] = self.ttl_seconds
+        return out
+
+
+# Limits come from the environment in init_app, once create_app has loaded .env.
+snapshot_cache = SnapshotCache()
+
+
+def init_app(app) -> None:
+    """Size the snapshot cache from OPENWEATHER_CACHE_TTL_SECONDS / OPENWEATHER_CACHE_MAX."""
+    snapshot_cache.configure(
+        ttl_seconds=float(os.getenv("OPENWEATHER_CACHE_TTL_SECONDS", "300")),
+        max_entries=int(os.getenv("OPENWEATHER_CACHE_MAX", "1000")),
+    )
+
+
+def _prefetched(key: RequestKey) -> Any:
+    if not has_request_context():
+        return None
+    return (request.environ.get(PREFETCH_ENVIRON_KEY) or {}).get(key)
+
+
+def get(url: str, params: Dict[str, Any]):
+    """GET an OpenWeather endpoint through the snapshot cache, reusing the response if the
+    ASGI gateway already fetched it.
+
+    A prefetch that failed re-raises its exception here, so callers keep their existing
+    fallbacks and error responses.
+    """
+    key = request_key(url, params)
+    cached = snapshot_cache.get(key)
+    if cached is not None:
+        return cached[1]
+    hit = _prefetched(key)
+    if isinstance(hit, BaseException):
+        raise hit
+    if hit is not None:
+        return hit
+    with span(SPAN_NAMES.get(url, "openweather")):
+        resp = requests.get(url, params=params, timeout=TIMEOUT_SECONDS)
+    if resp.status_code != 200:
+        return resp
+    return snapshot_cache.put(key, resp.status_code, resp.json())
+
+
+# Request parameters and response parsing shared by the blocking helpers in routes/ and
+# the async prefetch in utils/asgi.py.
+
+def geocode_params(city: str, api_key: str) -> Dict[str, Any]:
+    return {"q": city, "limit": 1, "appid": api_key}
+
+
+def parse_geocode(data: Any) -> Tuple[Optional[float], Optional[float]]:
+    if isinstance(data, list) and data:
+        return data[0].get("lat"), data[0].get("lon")
+    return None, None
+
+
+def air_pollution_params(lat: float, lon: float, api_key: str) -> Dict[str, Any]:
+    return {"lat": lat, "lon": lon, "appid": api_key}
+
+
+def weather_params(city: str, api_key: str) -> Dict[str, Any]:
+    return {"q": city, "appid": api_key, "units": "metric"}
+
+
+def weather_keys(city: str, api_key: str) -> List[RequestKey]:
+    return [request_key(WEATHER_URL, weather_params(city, api_key))]
+
+
+def air_quality_keys(city: str, api_key: str) -> Optional[List[RequestKey]]:
+    """Requests behind a geocode + air-pollution lookup; None while the geocode is not cached."""
+    geo_key = request_key(GEOCODE_URL, geocode_params(city, api_key))
+    cached = snapshot_cache.get(geo_key)
+    if cached is None:
+        return None
+    lat, lon = parse_geocode(cached[1].json())
+    if lat is None or lon is None:
+        return [geo_key]
+    return [geo_key, request_key(AIR_POLLUTION_URL, air_pollution_params(lat, lon, api_key))]
@@ -0,0 +1,189 @@
+import io
+import os
+import hmac
+import time
+import uuid
+import random
+import pstats
+import cProfile
+import threading
+import functools
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Held while a request runs under cProfile
+_profile_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class ProfileStore:
+    """Bounded in-memory store of request profiles, newest last; the oldest is evicted first."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[entry["id"]] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries (without the stats payload), newest first."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return [{k: v for k, v in e.items() if k not in ("top", "text")} for e in reversed(entries)]
+
+    def clear(self) -> int:
+        with self._lock:
+            n = len(self._entries)
+            self._entries.clear()
+            return n
+
+
+class RequestProfiler:
+    """Runs selected requests' view functions under cProfile and keeps a pstats summary.
+
+    A request is profiled when it carries ``X-Profile-Token`` matching PROFILE_ADMIN_TOKEN, or
+    when it falls in the PROFILE_SAMPLE_RATE sample. With neither configured nothing is wrapped,
+    so the disabled path costs nothing.
+    """
+
+    def __init__(self, admin_token: Optional[str] = None, sample_rate: float = 0.0, top: int = 40, max_entries: int = 50):
+        self.configure(admin_token, sample_rate, top, max_entries)
+
+    def configure(self, admin_token: Optional[str], sample_rate: float, top: int, max_entries: int) -> None:
+        self.admin_token = admin_token or None
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.top = max(1, top)
+        self.store = ProfileStore(max_entries)
+
+    def configure_from_env(self) -> None:
+        self.configure(
+            admin_token=os.getenv("PROFILE_ADMIN_TOKEN"),
+            sample_rate=_env_float("PROFILE_SAMPLE_RATE", 0.0),
+            top=int(os.getenv("PROFILE_TOP_FUNCTIONS", "40")),
+            max_entries=int(os.getenv("PROFILE_STORE_SIZE", "50")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        return bool(self.admin_token and token) and hmac.compare_digest(token, self.admin_token)
+
+    def _trigger(self) -> Optional[str]:
+        from flask import request
+
+        if self.is_admin(request.headers.get(PROFILE_HEADER)):
+            return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def wrap(self, endpoint: str, view: Callable) -> Callable:
+        @functools.wraps(view)
+        def profiled(*args, **kwargs):
+            trigger = self._trigger()
+            if trigger is None:
+                return view(*args, **kwargs)
+            return self._run(endpoint, trigger, view, args, kwargs)
+
+        return profiled
+
+    def _run(self, endpoint: str, trigger: str, view: Callable, args, kwargs):
+        from flask import g, request
+
+        # cProfile takes the interpreter-wide profiling hook (sys.monitoring on 3.12+), so only
+        # one request is profiled at a time; overlapping ones run unprofiled.
+        if not _profile_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiling tool (debugger, coverage) holds the hook
+                return view(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                # Only the view body is covered; a streamed body is produced after it returns.
+                return view(*args, **kwargs)
+            finally:
+                profiler.disable()
+                seconds = time.perf_counter() - started
+                profile_id = uuid.uuid4().hex
+                g.profile_id = profile_id
+                self.store.add({
+                    "id": profile_id,
+                    "endpoint": endpoint,
+                    "method": request.method,
+                    "path": request.path,
+                    "trigger": trigger,
+                    "seconds": round(seconds, 6),
+                    "createdAt": datetime.utcnow().isoformat() + "Z",
+                    **self._summarize(profiler),
+                })
+        finally:
+            _profile_lock.release()
+
+    def _summarize(self, profiler: cProfile.Profile) -> Dict[str, Any]:
+        buf = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buf)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():  # type: ignore[attr-defined]
+            rows.append({
+                "function": f"{filename}:{line}({func})",
+                "calls": nc,
+                "primitiveCalls": cc,
+                "totalSeconds": round(tt, 6),
+                "cumulativeSeconds": round(ct, 6),
+            })
+        rows.sort(key=lambda r: r["cumulativeSeconds"], reverse=True)
+        return {
+            "totalCalls": stats.total_calls,  # type: ignore[attr-defined]
+            "top": rows[: self.top],
+            "text": buf.getvalue(),
+        }
+
+    def init_app(self, app) -> None:
+        """Configure from the PROFILE_* environment (create_app has loaded .env by now), then wrap
+        every registered view (all blueprints) and tag profiled responses with their id."""
+        self.configure_from_env()
+        if not self.enabled:
+            return
+        from flask import g
+
+        for endpoint, view in list(app.view_functions.items()):
+            if endpoint == "static" or endpoint.startswith("debug."):
+                continue
+            app.view_functions[endpoint] = self.wrap(endpoint, view)
+
+        @app.after_request
+        def _profile_id_header(response):
+            profile_id = g.pop("profile_id", None)
+            if profile_id:
+                response.headers[PROFILE_ID_HEADER] = profile_id
+            return response
+
+
+# Disabled until init_app reads the PROFILE_* settings
+request_profiler = RequestProfiler()
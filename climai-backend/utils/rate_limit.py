@@ -0,0 +1,148 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, n: float = 1.0) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= n:
+                self._tokens -= n
+                return True
+            return False
+
+    def refund(self, n: float = 1.0) -> None:
+        """Give back tokens taken for a call that did not go ahead."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + n)
+
+
+class CallGate:
+    """Admission control for an expensive upstream: rate limits plus bounded concurrency.
+
+    A call is admitted only if its caller's bucket and the global bucket both have a token and
+    a concurrency slot frees up within the queue-wait budget. Anything else is shed so the
+    caller can take its cheap fallback path instead of waiting on the upstream; tokens taken
+    for a shed call are refunded, so rejections do not use up anyone's quota.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        rate_per_sec: float,
+        burst: float,
+        user_rate_per_sec: float,
+        user_burst: float,
+        queue_wait_seconds: float,
+        max_users: int = 10000,
+    ):
+        self.queue_wait_seconds = queue_wait_seconds
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._max_concurrent = max_concurrent
+        self._global = TokenBucket(rate_per_sec, burst)
+        self._user_rate = user_rate_per_sec
+        self._user_burst = user_burst
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._max_users = max_users
+        self._lock = threading.Lock()
+        self._cooldown_until = 0.0
+        self._in_flight = 0
+        self._counters: Dict[str, int] = {
+            "admitted": 0,
+            "queued": 0,
+            "shed": 0,
+            "shedUserRate": 0,
+            "shedGlobalRate": 0,
+            "shedQueueTimeout": 0,
+            "shedCooldown": 0,
+        }
+
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._counters[key] += 1
+
+    def _user_bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._users.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self._user_rate, self._user_burst)
+                self._users[key] = bucket
+                if len(self._users) > self._max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(key)
+            return bucket
+
+    def acquire(self, user_key: Optional[str], max_wait: Optional[float] = None) -> bool:
+        """Try to admit one call. Returns True if admitted; the caller must then call release()."""
+        if time.monotonic() < self._cooldown_until:
+            self._count("shed", "shedCooldown")
+            return False
+        user_bucket = self._user_bucket(user_key) if user_key else None
+        if user_bucket is not None and not user_bucket.try_take():
+            self._count("shed", "shedUserRate")
+            return False
+        if not self._global.try_take():
+            if user_bucket is not None:
+                user_bucket.refund()
+            self._count("shed", "shedGlobalRate")
+            return False
+
+        if not self._slots.acquire(blocking=False):
+            self._count("queued")
+            wait = self.queue_wait_seconds if max_wait is None else max(0.0, min(self.queue_wait_seconds, max_wait))
+            if not self._slots.acquire(timeout=wait):
+                self._global.refund()
+                if user_bucket is not None:
+                    user_bucket.refund()
+                self._count("shed", "shedQueueTimeout")
+                return False
+        with self._lock:
+            self._counters["admitted"] += 1
+            self._in_flight += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def cool_down(self, seconds: float) -> None:
+        """Shed every call for ``seconds``, e.g. after the upstream reports quota exhaustion."""
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["inFlight"] = self._in_flight
+            out["maxConcurrent"] = self._max_concurrent
+            out["coolingDown"] = time.monotonic() < self._cooldown_until
+        return out
+
+
+def gate_from_env(prefix: str) -> CallGate:
+    """Build a CallGate from ``<PREFIX>_*`` environment variables."""
+    return CallGate(
+        max_concurrent=int(os.getenv(f"{prefix}_MAX_CONCURRENT", "4")),
+        rate_per_sec=float(os.getenv(f"{prefix}_RATE_PER_SEC", "2")),
+        burst=float(os.getenv(f"{prefix}_BURST", "10")),
+        user_rate_per_sec=float(os.getenv(f"{prefix}_USER_RATE_PER_MIN", "10")) / 60.0,
+        user_burst=float(os.getenv(f"{prefix}_USER_BURST", "5")),
+        queue_wait_seconds=float(os.getenv(f"{prefix}_QUEUE_WAIT_SECONDS", "2")),
+    )
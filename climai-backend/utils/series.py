@@ -0,0 +1,39 @@
+from typing import Any, Callable, Dict, List, Sequence
+
+
+def lttb(points: Sequence[Dict[str, Any]], threshold: int, x: Callable[[Dict[str, Any]], float], y: Callable[[Dict[str, Any]], float]) -> List[Dict[str, Any]]:
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Picks ``threshold`` of the (x-ordered) ``points`` that best preserve the visual shape of the
+    series; the first and last points are always kept. Points are returned unchanged, so any extra
+    keys (min/max/count) survive.
+    """
+    n = len(points)
+    if threshold >= n or n <= 2:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]]
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        span = points[nxt_start:nxt_end] or [points[-1]]
+        avg_x = sum(x(p) for p in span) / len(span)
+        avg_y = sum(y(p) for p in span) / len(span)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = x(points[a]), y(points[a])
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (y(points[j]) - ay) - (ax - x(points[j])) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,70 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A warm-up step returns normally when done, returns False to mark itself skipped, or raises.
+WarmupTask = Tuple[str, Callable[[], Optional[bool]]]
+
+
+class Readiness:
+    """Tracks the start-up warm-up steps (Mongo check, ML artifacts, SDK imports).
+
+    The instance is ready once no step is pending; failed steps count as finished but are
+    reported, since the endpoints that depend on them degrade rather than crash.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.mode = "eager"
+        self._started = time.monotonic()
+
+    def _set(self, name: str, **fields: Any) -> None:
+        with self._lock:
+            self._steps.setdefault(name, {}).update(fields)
+
+    def run(self, name: str, fn: Callable[[], Optional[bool]]) -> None:
+        t0 = time.perf_counter()
+        self._set(name, state="running")
+        try:
+            result = fn()
+            state = "skipped" if result is False else "ready"
+            self._set(name, state=state, seconds=round(time.perf_counter() - t0, 3))
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            self._set(name, state="failed", error=str(e), seconds=round(time.perf_counter() - t0, 3))
+
+    def start(self, tasks: List[WarmupTask], background: bool) -> None:
+        """Run ``tasks`` inline (eager) or each on its own daemon thread (lazy)."""
+        self.mode = "lazy" if background else "eager"
+        self._started = time.monotonic()
+        for name, _ in tasks:
+            self._set(name, state="pending")
+        for name, fn in tasks:
+            if background:
+                threading.Thread(target=self.run, args=(name, fn), name=f"warmup-{name}", daemon=True).start()
+            else:
+                self.run(name, fn)
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(s.get("state") not in ("pending", "running") for s in self._steps.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {name: dict(s) for name, s in self._steps.items()}
+        pending = [n for n, s in steps.items() if s.get("state") in ("pending", "running")]
+        return {
+            "mode": self.mode,
+            "ready": not pending,
+            "degraded": any(s.get("state") == "failed" for s in steps.values()),
+            "sinceStartSeconds": round(time.monotonic() - self._started, 3),
+            "steps": steps,
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,160 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+from bson.objectid import ObjectId
+from flask import g, has_request_context, request
+
+from utils.auth import decode_token, TOKEN_CLAIMS_VERSION
+from utils.db import get_collections
+
+# Profile fields the read paths need; password hashes never enter the cache.
+PROFILE_FIELDS = {"name": 1, "email": 1, "city": 1}
+
+
+class ProfileCache:
+    """Process-wide TTL + LRU cache of user profiles keyed by user id.
+
+    Entries expire after ``ttl_seconds`` so edits made by other processes become visible
+    within that window; edits made through this process call ``invalidate`` immediately.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def configure(self, ttl_seconds: float, max_entries: int) -> None:
+        """Apply new limits; entries cached under the old TTL are dropped."""
+        with self._lock:
+            self.ttl_seconds = ttl_seconds
+            self.max_entries = max_entries
+            self._entries.clear()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, user_id: str, profile: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["size"] = len(self._entries)
+        out["ttlSeconds"] = self.ttl_seconds
+        return out
+
+
+# Limits come from the environment in init_app, once create_app has loaded .env.
+profile_cache = ProfileCache()
+
+
+def init_app(app) -> None:
+    """Size the profile cache from USER_CACHE_TTL_SECONDS / USER_CACHE_MAX."""
+    profile_cache.configure(
+        ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+        max_entries=int(os.getenv("USER_CACHE_MAX", "10000")),
+    )
+
+
+def load_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """Return {name, email, city} for ``user_id`` from the cache or a single projected read."""
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+    cols = get_collections()
+    if not cols:
+        return None
+    try:
+        doc = cols["users"].find_one({"_id": ObjectId(user_id)}, PROFILE_FIELDS)
+    except Exception:
+        return None
+    if not doc:
+        return None
+    profile = {"id": user_id, "name": doc.get("name"), "email": doc.get("email"), "city": doc.get("city")}
+    profile_cache.put(user_id, profile)
+    return profile
+
+
+class UserContext:
+    """The caller identified by a bearer token; the profile is loaded at most once, on first use."""
+
+    __slots__ = ("claims", "_profile", "_loaded")
+
+    def __init__(self, claims: Optional[Dict[str, Any]]):
+        self.claims = claims
+        self._profile: Optional[Dict[str, Any]] = None
+        self._loaded = False
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.claims.get("sub") if self.claims else None
+
+    @property
+    def object_id(self) -> Optional[ObjectId]:
+        try:
+            return ObjectId(self.user_id) if self.user_id else None
+        except Exception:
+            return None
+
+    @property
+    def profile(self) -> Optional[Dict[str, Any]]:
+        if not self._loaded:
+            self._profile = load_profile(self.user_id) if self.object_id else None
+            self._loaded = True
+        return self._profile
+
+    @property
+    def has_profile_claims(self) -> bool:
+        return bool(self.claims) and int(self.claims.get("ver") or 1) >= TOKEN_CLAIMS_VERSION
+
+    @property
+    def city(self) -> Optional[str]:
+        # Current tokens carry the city, so the common path does no database I/O at all;
+        # a token issued without one (or an older token) falls back to the profile.
+        city = self.claims.get("city") if self.has_profile_claims else None
+        if not city:
+            city = (self.profile or {}).get("city")
+        return city.strip() if city and city.strip() else None
+
+
+def user_from_auth_header(auth: str) -> UserContext:
+    """Build a UserContext from an Authorization header value (usable off the request thread)."""
+    claims = decode_token(auth.split(" ", 1)[1]) if auth and auth.startswith("Bearer ") else None
+    return UserContext(claims)
+
+
+def current_user() -> UserContext:
+    """The UserContext for the current request, decoded once and shared by every caller."""
+    if not has_request_context():
+        return UserContext(None)
+    ctx = g.get("user_context")
+    if ctx is None:
+        ctx = user_from_auth_header(request.headers.get("Authorization", ""))
+        g.user_context = ctx
+    return ctx
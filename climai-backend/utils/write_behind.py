@@ -0,0 +1,134 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_queues: Dict[str, "WriteBehindQueue"] = {}
+
+
+class PartialWriteError(Exception):
+    """Raised by a flush function when only ``written`` documents of its batch were persisted."""
+
+    def __init__(self, written: int, message: str):
+        super().__init__(message)
+        self.written = written
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue whose documents are persisted in batches by a background thread.
+
+    ``flush_fn(batch)`` is called with up to ``batch_size`` documents once the batch is full or
+    ``flush_interval`` seconds after its first document arrived, and once more at interpreter exit.
+    ``put`` never blocks: when the queue is full it returns False and the caller decides what to do.
+    """
+
+    def __init__(self, name: str, flush_fn: Callable[[List[Any]], None], max_size: int = 1000,
+                 batch_size: int = 100, flush_interval: float = 0.5):
+        self.name = name
+        self._flush_fn = flush_fn
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "written": 0, "failed": 0, "rejected": 0, "batches": 0}
+        _queues[name] = self
+        atexit.register(self.close)
+
+    def put(self, doc: Any) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(doc)
+        except queue.Full:
+            self._count("rejected")
+            return False
+        self._count("enqueued")
+        return True
+
+    def flush(self) -> None:
+        """Write everything currently queued, on the calling thread."""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["pending"] = self._queue.qsize()
+        return out
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _ensure_started(self) -> None:
+        # Started lazily (and restarted in a forked child, where the thread does not survive)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _drain(self, limit: int) -> List[Any]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Any]) -> None:
+        with self._flush_lock:
+            try:
+                self._flush_fn(batch)
+                self._count("written", len(batch))
+                self._count("batches")
+            except PartialWriteError as e:
+                self._count("written", e.written)
+                self._count("failed", len(batch) - e.written)
+                self._count("batches")
+                logger.error("Write-behind flush for %s partly failed (%d of %d documents written): %s",
+                             self.name, e.written, len(batch), e)
+            except Exception as e:
+                self._count("failed", len(batch))
+                logger.exception("Write-behind flush for %s failed (%d documents): %s", self.name, len(batch), e)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+
+def all_stats() -> Dict[str, Dict[str, int]]:
+    return {name: q.stats() for name, q in _queues.items()}
@@ -13,6 +13,8 @@ export default function ClimateChatbot() {
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
   const listRef = useRef<HTMLDivElement | null>(null);
+  // Server keeps the conversation; we only send the session id and the new message
+  const sessionIdRef = useRef<string | null>(null);
 
   useEffect(() => {
     if (listRef.current) {
@@ -23,15 +25,15 @@ export default function ClimateChatbot() {
   const sendMessage = async () => {
     const trimmed = input.trim();
     if (!trimmed || loading) return;
-    const historyPayload = [...messages, { role: 'user', text: trimmed }];
     setMessages(m => [...m, { role: 'user', text: trimmed }]);
     setInput('');
     setLoading(true);
     try {
-      const res = await apiFetch<{ answer: string; message: string; suggestions?: string[] }>("/api/chat/ask", {
+      const res = await apiFetch<{ answer: string; message: string; suggestions?: string[]; sessionId?: string }>("/api/chat/ask", {
         method: 'POST',
-        body: JSON.stringify({ message: trimmed, history: historyPayload })
+        body: JSON.stringify({ message: trimmed, sessionId: sessionIdRef.current })
       });
+      if (res.sessionId) sessionIdRef.current = res.sessionId;
       setMessages(m => [...m, { role: 'bot', text: res.answer }]);
       if (res.suggestions && res.suggestions.length) {
         setMessages(m => [...m, { role: 'bot', text: `Tips: ${res.suggestions.join('; ')}` }]);
@@ -54,6 +56,7 @@ export default function ClimateChatbot() {
     setOpen(false);
     // Reset conversation when closing as requested
     setMessages(initialGreeting);
+    sessionIdRef.current = null;
     setInput('');
   };
 